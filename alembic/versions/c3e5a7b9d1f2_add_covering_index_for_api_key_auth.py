@@ -0,0 +1,33 @@
+"""Add covering index for API key auth
+
+Revision ID: c3e5a7b9d1f2
+Revises: aa0b5a1bb1f1
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d1f2'
+down_revision: Union[str, None] = 'aa0b5a1bb1f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_users_api_key_auth',
+        'users',
+        ['api_key'],
+        unique=False,
+        postgresql_include=['id', 'username', 'email', 'is_active', 'is_superuser', 'api_key_created_at'],
+        postgresql_where=sa.text('api_key IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_api_key_auth', table_name='users')
@@ -18,6 +18,7 @@ from src.exceptions import MemoryMCPException
 from src.exceptions.handlers import handle_memory_mcp_exception
 from src.utils.health import perform_full_health_check
 from src.db.database import dispose_all_engines
+from src.utils.vector_store import close_shared_clients
 import os
 from starlette.middleware.sessions import SessionMiddleware
 from src.core.security import SECRET_KEY as AUTH_SECRET_KEY
@@ -75,6 +76,9 @@ async def graceful_shutdown():
     except Exception as e:
         logger.error(f"Error disposing database engines: {e}", exc_info=True)
     
+    # Close the Qdrant clients shared on this event loop
+    await close_shared_clients()
+    
     # Additional cleanup can be added here
     logger.info("Graceful shutdown completed.")
 
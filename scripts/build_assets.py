@@ -0,0 +1,45 @@
+"""
+Minify the static HTML assets served by the middlewares.
+
+Usage: python scripts/build_assets.py
+
+Writes <name>.min.html next to each source asset; the middlewares load the minified
+files, so re-run this after editing a source asset. Only whitespace is removed:
+indentation and blank lines everywhere, plus the padding around CSS punctuation.
+Line breaks are kept outside <style> so inline-element spacing and JavaScript
+automatic semicolon insertion behave exactly as in the source.
+"""
+
+import re
+from pathlib import Path
+
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "src" / "middlewares" / "assets"
+SOURCES = ["oauth_redirect.html"]
+
+_STYLE_RE = re.compile(r"(<style>)(.*?)(</style>)", re.DOTALL)
+_CSS_PUNCTUATION_RE = re.compile(r"\s*([{};:,>])\s*")
+
+
+def _minify_css(css: str) -> str:
+    css = _CSS_PUNCTUATION_RE.sub(r"\1", " ".join(css.split()))
+    return css.replace(";}", "}")
+
+
+def minify_html(source: str) -> str:
+    source = _STYLE_RE.sub(lambda m: m.group(1) + _minify_css(m.group(2)) + m.group(3), source)
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def main() -> None:
+    for name in SOURCES:
+        source_path = ASSETS_DIR / name
+        target_path = source_path.with_suffix(".min.html")
+        source = source_path.read_text(encoding="utf-8")
+        minified = minify_html(source)
+        target_path.write_text(minified, encoding="utf-8")
+        print(f"{source_path.name}: {len(source.encode())} -> {len(minified.encode())} bytes ({target_path.name})")
+
+
+if __name__ == "__main__":
+    main()
@@ -132,6 +132,18 @@ if not DB_PASSWORD or DB_PASSWORD.strip() == "":
 ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# Connection Pool Configuration
+# Applied to each per-event-loop async engine (API and MCP servers run separate loops)
+DB_POOL_SIZE = int(os.getenv("SQLALCHEMY_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", "40"))
+DB_POOL_TIMEOUT = int(os.getenv("SQLALCHEMY_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("SQLALCHEMY_POOL_RECYCLE", "1800"))
+
+# DB_PGBOUNCER: Set to "true" when DB_HOST points at PgBouncer in transaction mode.
+# Disables asyncpg's server-side prepared statement cache, which transaction
+# pooling cannot support because consecutive statements may hit different backends.
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
 def get_mcp_connection_url(api_key: str) -> str:
     """
     Generate the private MCP connection URL for a given API key.
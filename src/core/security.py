@@ -1,4 +1,5 @@
 import os
+import re
 import bcrypt
 from datetime import datetime, timedelta, timezone
 from typing import Optional
@@ -14,6 +15,10 @@ SECRET_KEY = os.getenv("AUTH_SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("AUTH_ACCESS_TOKEN_EXPIRE_MINUTES"))
 
+# API keys are "sk_" + secrets.token_urlsafe(32); the length range leaves room for other sizes
+API_KEY_PREFIX = "sk_"
+_API_KEY_FORMAT = re.compile(r"sk_[A-Za-z0-9_-]{16,128}")
+
 # Raise an error if the environment variables are not set
 if not SECRET_KEY:
     raise ConfigurationError(
@@ -68,6 +73,10 @@ def get_password_hash(password: str) -> str:
     hashed_bytes = bcrypt.hashpw(password_bytes, salt)
     return hashed_bytes.decode('utf-8')
 
+def is_well_formed_api_key(api_key: str) -> bool:
+    """Cheap shape check so malformed keys can be rejected without a cache or database lookup."""
+    return _API_KEY_FORMAT.fullmatch(api_key) is not None
+
 def decode_token(token: str) -> Optional[TokenPayload]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
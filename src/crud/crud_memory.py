@@ -1,6 +1,6 @@
 import uuid
 from typing import Optional, List
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models.memory import Memory
@@ -136,30 +136,27 @@ async def delete_memory(
         )
 
 
-async def delete_all_user_memories(
+async def delete_all_user_memories_returning_ids(
     db: AsyncSession,
     user_id: uuid.UUID
-) -> int:
-    """Delete all memories for a user. Returns count of deleted memories."""
+) -> List[uuid.UUID]:
+    """Delete all memories for a user in one statement. Returns the deleted memory IDs."""
     try:
-        # Get all user memories first to count them
-        memories = await get_user_memories(db, user_id)
-        count = len(memories)
-        
-        if count == 0:
-            return 0
-        
-        # Delete all memories for the user
-        from sqlalchemy import delete
-        stmt = delete(Memory).where(Memory.user_id == user_id)
-        await db.execute(stmt)
-        await db.flush()
-        
-        return count
+        stmt = delete(Memory).where(Memory.user_id == user_id).returning(Memory.id)
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
     except Exception as e:
         raise DatabaseOperationError(
             message="Failed to delete all user memories",
             operation="bulk_delete",
             table_name="memories",
             original_exception=e
-        ) 
\ No newline at end of file
+        )
+
+
+async def delete_all_user_memories(
+    db: AsyncSession,
+    user_id: uuid.UUID
+) -> int:
+    """Delete all memories for a user. Returns count of deleted memories."""
+    return len(await delete_all_user_memories_returning_ids(db, user_id))
@@ -1,15 +1,34 @@
-from typing import Optional
+from typing import Optional, Union
 import secrets
 from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import Row, bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.security import get_password_hash, verify_password
+from src.core.security import API_KEY_PREFIX, get_password_hash, verify_password
 from src.db.models.user import User
 from src.schemas.user import UserCreate, UserUpdate
+from src.utils.api_key_cache import api_key_cache
 from src.utils.user_cache import get_cached_user, set_cached_user, invalidate_user_cache, invalidate_user_cache_by_keys
 
+# Columns the auth middlewares need (see CachedUser); the covering index on users.api_key
+# INCLUDEs these so the API key lookup is an index-only scan
+_AUTH_SNAPSHOT_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.is_active,
+    User.is_superuser,
+    User.api_key_created_at,
+)
+
+# Auth lookups run on every cache miss, so their statements are built once: each execution
+# reuses the same statement object (and its memoized compiled-cache key) with a bound value
+_USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+_USER_BY_API_KEY = select(User).where(User.api_key == bindparam("api_key"))
+_AUTH_SNAPSHOT_BY_USERNAME = select(*_AUTH_SNAPSHOT_COLUMNS).where(User.username == bindparam("username"))
+_AUTH_SNAPSHOT_BY_API_KEY = select(*_AUTH_SNAPSHOT_COLUMNS).where(User.api_key == bindparam("api_key"))
+
 async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
     result = await db.execute(select(User).filter(User.id == user_id))
     return result.scalars().first()
@@ -24,7 +43,7 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
     if cached_user:
         return cached_user
 
-    result = await db.execute(select(User).filter(User.username == username))
+    result = await db.execute(_USER_BY_USERNAME, {"username": username})
     user = result.scalars().first()
 
     if user:
@@ -33,19 +52,45 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
     return user
 
 async def get_user_by_api_key(db: AsyncSession, api_key: str) -> Optional[User]:
+    # Keys recently found to be invalid (by this or the MCP auth middleware) are answered
+    # from the in-process negative cache, so retries and key scans don't reach Postgres
+    hit, snapshot = api_key_cache.lookup(api_key)
+    if hit and snapshot is None:
+        return None
+
     cache_key = f"user:apikey:{api_key}"
     cached_user = get_cached_user(cache_key)
     if cached_user:
         return cached_user
 
-    result = await db.execute(select(User).filter(User.api_key == api_key))
+    result = await db.execute(_USER_BY_API_KEY, {"api_key": api_key})
     user = result.scalars().first()
 
     if user:
         set_cached_user(user)
+    else:
+        api_key_cache.put(api_key, None)
 
     return user
 
+async def get_api_key_auth_snapshot(db: AsyncSession, api_key: str) -> Optional[Union[Row, User]]:
+    """Fetch just the auth fields for an API key as a row, without hydrating a User (Redis hits return the cached User)."""
+    cached_user = get_cached_user(f"user:apikey:{api_key}")
+    if cached_user:
+        return cached_user
+
+    result = await db.execute(_AUTH_SNAPSHOT_BY_API_KEY, {"api_key": api_key})
+    return result.first()
+
+async def get_username_auth_snapshot(db: AsyncSession, username: str) -> Optional[Union[Row, User]]:
+    """Fetch just the auth fields for a username (JWT subject) as a row, without hydrating a User."""
+    cached_user = get_cached_user(f"user:username:{username}")
+    if cached_user:
+        return cached_user
+
+    result = await db.execute(_AUTH_SNAPSHOT_BY_USERNAME, {"username": username})
+    return result.first()
+
 
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     hashed_password = get_password_hash(user_in.password)
@@ -104,7 +149,7 @@ async def create_api_key(db: AsyncSession, user: User) -> str:
     old_api_key = user.api_key
 
     # Generate a secure random API key
-    api_key = f"sk_{secrets.token_urlsafe(32)}"
+    api_key = f"{API_KEY_PREFIX}{secrets.token_urlsafe(32)}"
 
     # Update user with the new API key
     user.api_key = api_key
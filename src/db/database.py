@@ -1,4 +1,5 @@
 import asyncio
+import uuid
 from typing import AsyncGenerator, Generator, Dict
 import weakref
 import logging
@@ -12,7 +13,15 @@ from sqlalchemy.ext.asyncio import (
     AsyncEngine,
 )
 
-from src.core.config import ASYNC_DATABASE_URL, DATABASE_URL
+from src.core.config import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_PGBOUNCER,
+)
 
 # Configure logger for database operations
 logger = logging.getLogger(__name__)
@@ -43,21 +52,28 @@ def get_async_engine() -> AsyncEngine:
     if loop not in _async_engines:
         # Create a new engine for this event loop
         logger.info(f"Creating new async engine for event loop {id(loop)}")
+        connect_args = {
+            "server_settings": {
+                "application_name": f"memory_mcp_loop_{id(loop)}",
+            },
+            "command_timeout": 60,  # Prevent hanging connections
+        }
+        if DB_PGBOUNCER:
+            # PgBouncer transaction mode can route each statement to a different
+            # backend, so named prepared statements must be unique and uncached
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+
         engine = create_async_engine(
             ASYNC_DATABASE_URL, 
             echo=True,
-            # Optimized pool settings per event loop
-            pool_size=5,        # Smaller pool per loop
-            max_overflow=10,    # Additional connections when needed
-            pool_timeout=30,    # Wait time for connection
-            pool_recycle=1800,  # Recycle connections every 30 minutes
+            # Pool settings per event loop, sized via SQLALCHEMY_* env vars
+            pool_size=DB_POOL_SIZE,         # Persistent connections kept warm
+            max_overflow=DB_MAX_OVERFLOW,   # Additional connections when needed
+            pool_timeout=DB_POOL_TIMEOUT,   # Wait time for connection
+            pool_recycle=DB_POOL_RECYCLE,   # Recycle connections every 30 minutes
             pool_pre_ping=True, # Verify connections before use
-            connect_args={
-                "server_settings": {
-                    "application_name": f"memory_mcp_loop_{id(loop)}",
-                },
-                "command_timeout": 60,  # Prevent hanging connections
-            }
+            connect_args=connect_args
         )
         _async_engines[loop] = engine
         
@@ -77,13 +93,18 @@ def get_async_engine() -> AsyncEngine:
 
 def get_async_sessionmaker() -> async_sessionmaker:
     """Get the async sessionmaker for the current event loop."""
-    get_async_engine()  # Ensure engine exists first
     try:
         loop = asyncio.get_running_loop()
-        return _async_sessionmakers[loop]
     except RuntimeError:
         logger.error("No event loop running when trying to get sessionmaker")
         raise
+    # Called for every request (get_async_db, MCP tools), so the common case is one lookup;
+    # the engine and sessionmaker are only built on a loop's first call
+    session_maker = _async_sessionmakers.get(loop)
+    if session_maker is None:
+        get_async_engine()
+        session_maker = _async_sessionmakers[loop]
+    return session_maker
 
 # --- Session Dependencies ---
 
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,6 +7,15 @@ from src.db.models.custom_base import CustomBase
 
 class User(CustomBase):
     __tablename__ = "users"
+    __table_args__ = (
+        # Covering index for API key auth: lets the middleware lookup run as an index-only scan
+        Index(
+            "ix_users_api_key_auth",
+            "api_key",
+            postgresql_include=["id", "username", "email", "is_active", "is_superuser", "api_key_created_at"],
+            postgresql_where=text("api_key IS NOT NULL"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
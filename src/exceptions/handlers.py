@@ -5,10 +5,11 @@ This module provides utilities for converting custom exceptions to HTTP response
 logging errors, and handling exception propagation throughout the application.
 """
 
+import json
 import logging
 from typing import Dict, Any, Union, Optional
 from fastapi import HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 
 from .base import MemoryMCPException
 from .auth import (
@@ -21,6 +22,15 @@ from .external_service import ExternalServiceError, ServiceUnavailableError, Ser
 
 logger = logging.getLogger(__name__)
 
+# Same settings JSONResponse.render passes to json.dumps; built once, since json.dumps
+# creates a new encoder on every call that uses non-default options
+_JSON_ENCODER = json.JSONEncoder(
+    ensure_ascii=False,
+    allow_nan=False,
+    indent=None,
+    separators=(",", ":")
+)
+
 
 class ExceptionHandler:
     """
@@ -81,16 +91,8 @@ class ExceptionHandler:
         return HTTPException(status_code=status_code, detail=detail)
     
     @classmethod
-    def to_json_response(cls, exception: MemoryMCPException) -> JSONResponse:
-        """
-        Convert a custom exception to a JSONResponse.
-        
-        Args:
-            exception: The custom exception to convert
-            
-        Returns:
-            JSONResponse with appropriate status code and details
-        """
+    def _response_status_and_content(cls, exception: MemoryMCPException) -> tuple[int, Dict[str, Any]]:
+        """Status code and sanitized JSON content for an exception response."""
         status_code = cls.EXCEPTION_STATUS_MAP.get(
             type(exception),
             status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -101,7 +103,33 @@ class ExceptionHandler:
         if "context" in content:
             content["context"] = cls._sanitize_context(content["context"])
         
-        return JSONResponse(status_code=status_code, content=content)
+        return status_code, content
+    
+    @classmethod
+    def to_json_response(cls, exception: MemoryMCPException) -> Response:
+        """
+        Convert a custom exception to a JSON response.
+        
+        Args:
+            exception: The custom exception to convert
+            
+        Returns:
+            JSON Response with appropriate status code and details
+        """
+        status_code, body = cls.to_json_body(exception)
+        # Body is already rendered exactly as JSONResponse would, so skip its re-render
+        return Response(content=body, status_code=status_code, media_type="application/json")
+    
+    @classmethod
+    def to_json_body(cls, exception: MemoryMCPException) -> tuple[int, bytes]:
+        """
+        Render a custom exception as (status_code, JSON body bytes) for pure ASGI
+        middlewares that send the response messages themselves.
+        
+        The body is encoded the same way JSONResponse renders it.
+        """
+        status_code, content = cls._response_status_and_content(exception)
+        return status_code, _JSON_ENCODER.encode(content).encode("utf-8")
     
     @classmethod
     def log_exception(
@@ -180,7 +208,7 @@ class ExceptionHandler:
         return sanitized
 
 
-def handle_memory_mcp_exception(request, exception: MemoryMCPException) -> JSONResponse:
+def handle_memory_mcp_exception(request, exception: MemoryMCPException) -> Response:
     """
     FastAPI exception handler for MemoryMCPException.
     
@@ -192,7 +220,7 @@ def handle_memory_mcp_exception(request, exception: MemoryMCPException) -> JSONR
         exception: The MemoryMCPException to handle
         
     Returns:
-        JSONResponse with appropriate error details
+        JSON Response with appropriate error details
     """
     ExceptionHandler.log_exception(exception)
     return ExceptionHandler.to_json_response(exception)
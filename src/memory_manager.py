@@ -1,16 +1,93 @@
+import asyncio
+import json
+import logging
+import os
 import uuid
 from typing import Optional, TYPE_CHECKING
 from datetime import datetime
+from sqlalchemy import insert, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import Memory
-from src.exceptions import UserContextError, DatabaseOperationError
+from src.crud.crud_memory import (
+    update_memory as crud_update_memory,
+    delete_memory as crud_delete_memory,
+    delete_all_user_memories_returning_ids,
+)
+from src.crud.crud_processed_user_profile import delete_processed_user_profile
+from src.exceptions import UserContextError, DatabaseOperationError, MemorySearchError
 from src.utils.vector_store import VectorStore
+from src.utils.semantic_cache import semantic_query_cache
 from src.utils.profile_processor import ProfileProcessor
 
 if TYPE_CHECKING:
     from fastmcp import Context
 
+logger = logging.getLogger(__name__)
+
+# Memories embedded, upserted and inserted per round-trip in store_batch, and how many
+# chunks may be embedding/upserting at once
+STORE_BATCH_CHUNK_SIZE = int(os.getenv("MEMCP_STORE_BATCH", "64"))
+STORE_BATCH_CONCURRENCY = int(os.getenv("MEMCP_STORE_CONCURRENCY", "2"))
+
+# Batches larger than this are written to PostgreSQL with a single COPY
+STORE_BATCH_COPY_THRESHOLD = int(os.getenv("MEMCP_STORE_COPY_THRESHOLD", "500"))
+
+# Above this many IDs, delete_all_user_memories deletes from Qdrant by user filter instead
+QDRANT_DELETE_BY_ID_LIMIT = 10_000
+
+# Built once; SQLAlchemy caches its compiled form, and executing it with parameter dicts
+# skips ORM instance construction and the unit-of-work flush
+_INSERT_MEMORY = insert(Memory)
+
+# MEMORY_ASYNC_COMMIT: Set to "true" to commit memory writes with synchronous_commit off.
+# A crash can then lose the last few hundred milliseconds of acknowledged memory writes
+# (the database itself stays consistent). Only memory mutations opt in; user, auth and
+# OAuth transactions keep the server default.
+MEMORY_ASYNC_COMMIT = os.getenv("MEMORY_ASYNC_COMMIT", "false").lower() == "true"
+_ASYNC_COMMIT_STMT = text("SET LOCAL synchronous_commit = 'off'")
+
+# Same limit as the REST schemas (src/schemas/memory.py)
+MAX_MEMORY_CONTENT_LENGTH = 10_000
+
+
+def _normalize_batch(memories: list) -> tuple[list[tuple[str, list[str]]], list[tuple[int, str]]]:
+    """
+    Validate store_batch input. Content is stored exactly as given, like store().
+
+    Returns (valid, errors): valid holds (content, tags) pairs ready for storage and
+    errors holds (index, reason) for every rejected entry.
+    """
+    valid = []
+    errors = []
+    for index, memory_data in enumerate(memories):
+        if not isinstance(memory_data, dict):
+            errors.append((index, "entry must be an object with a 'content' key"))
+            continue
+
+        content = memory_data.get('content')
+        if not isinstance(content, str):
+            errors.append((index, "content must be a string"))
+            continue
+        if not content.strip():
+            errors.append((index, "content is empty"))
+            continue
+        if "\x00" in content:
+            # PostgreSQL text columns cannot store NUL
+            errors.append((index, "content contains a NUL character"))
+            continue
+        if len(content) > MAX_MEMORY_CONTENT_LENGTH:
+            errors.append((index, f"content exceeds {MAX_MEMORY_CONTENT_LENGTH} characters"))
+            continue
+
+        tags = memory_data.get('tags') or []
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            errors.append((index, "tags must be a list of strings"))
+            continue
+
+        valid.append((content, tags))
+    return valid, errors
+
 class MemoryManager:
     """Main interface for memory operations."""
     
@@ -20,16 +97,18 @@ class MemoryManager:
         port: int = None,
         collection_name: str = None,
         score_threshold: float = None,
-        upper_score_threshold: float = None
+        upper_score_threshold: float = None,
+        vector_store: Optional[VectorStore] = None
     ):
-        # Initialize vector store with all configuration
-        self.vector_store = VectorStore(
+        # Reuse an injected vector store, or build one with all configuration
+        self.vector_store = vector_store or VectorStore(
             host=host,
             port=port,
             collection_name=collection_name,
             score_threshold=score_threshold,
             upper_score_threshold=upper_score_threshold
         )
+        self.query_cache = semantic_query_cache
 
     async def store(self, content: str, db: AsyncSession, user_id: uuid.UUID, tags: Optional[list[str]] = None, date: Optional['datetime'] = None) -> str:
         """
@@ -49,16 +128,19 @@ class MemoryManager:
                 operation="store_memory"
             )
         
+        await self._relax_commit_durability(db)
+        
         # Generate a UUID for this memory
-        memory_id = str(uuid.uuid4())
+        memory_id = uuid.uuid4()
         
         # Store in vector database first
         await self.vector_store.store_memory(memory_id, content, user_id, tags)
+        self.query_cache.invalidate(user_id)
         
         # Store in relational database
         try:
             memory_data = {
-                "id": uuid.UUID(memory_id),
+                "id": memory_id,
                 "content": content,
                 "tags": tags or [],
                 "user_id": user_id
@@ -68,11 +150,13 @@ class MemoryManager:
             if date:
                 memory_data["created_at"] = date
                 
-            db_memory = Memory(**memory_data)
-            db.add(db_memory)
-            await db.flush()  # Use flush instead of commit as get_async_db handles commit
+            await db.execute(_INSERT_MEMORY, memory_data)  # get_async_db handles commit
         except Exception as e:
-            # TODO: if relational DB fails, we should ideally remove from vector DB too
+            # Compensate so retries don't leave orphaned vectors behind in Qdrant
+            try:
+                await self.vector_store.delete_memory(str(memory_id), user_id)
+            except Exception:
+                pass
             raise DatabaseOperationError(
                 message="Failed to store memory in relational database",
                 operation="insert",
@@ -82,7 +166,13 @@ class MemoryManager:
         
         return f"Memory stored with ID: {memory_id}"
 
-    async def search_related(self, query_text: str, user_id: uuid.UUID) -> list[dict]:
+    async def search_related(
+        self,
+        query_text: str,
+        user_id: uuid.UUID,
+        limit: int = 25,
+        time_budget_ms: Optional[int] = None
+    ) -> list[dict]:
         """Performs a semantic search for memories related to the query text."""
         # Validate user_id is provided
         if user_id is None:
@@ -91,14 +181,35 @@ class MemoryManager:
                 operation="search_memories"
             )
         
-        return await self.vector_store.search_memories(query_text, user_id)
+        # Taken before anything is read, so results that raced with a write are not cached
+        generation = self.query_cache.generation(user_id)
+        
+        try:
+            query_embedding = await self.vector_store.embed(query_text)
+        except Exception as e:
+            raise MemorySearchError(
+                message="Failed to embed search query",
+                query_text=query_text,
+                user_id=str(user_id),
+                search_type="semantic_search",
+                original_exception=e
+            )
+        
+        # Near-duplicate queries are answered from the semantic cache without touching Qdrant
+        cached = self.query_cache.get(user_id, query_embedding, limit)
+        if cached is not None:
+            return cached
+        
+        results = await self.vector_store.search_memories_with_embedding(
+            query_embedding, user_id, limit=limit, time_budget_ms=time_budget_ms, query_text=query_text
+        )
+        self.query_cache.put(user_id, query_embedding, limit, results, generation)
+        return results
 
     async def update_memory(self, memory_id: str, content: str, db: AsyncSession, user_id: uuid.UUID, tags: Optional[list[str]] = None) -> str:
         """
         Updates a memory in both vector and relational databases.
         """
-        from src.crud.crud_memory import update_memory
-        
         # Validate user_id is provided
         if user_id is None:
             raise UserContextError(
@@ -106,14 +217,21 @@ class MemoryManager:
                 operation="update_memory"
             )
         
-        # Update in PostgreSQL first
+        await self._relax_commit_durability(db)
+        
+        # Update PostgreSQL while the new content is embedded. The Qdrant upsert itself
+        # waits for the ownership check below, since upserting by ID could otherwise
+        # overwrite another user's point; it then hits the shared embedding cache.
         try:
-            updated_memory = await update_memory(
-                db=db,
-                memory_id=uuid.UUID(memory_id),
-                user_id=user_id,
-                content=content,
-                tags=tags
+            updated_memory, _ = await asyncio.gather(
+                crud_update_memory(
+                    db=db,
+                    memory_id=uuid.UUID(memory_id),
+                    user_id=user_id,
+                    content=content,
+                    tags=tags
+                ),
+                self._prefetch_embedding(content)
             )
             
             if not updated_memory:
@@ -137,7 +255,10 @@ class MemoryManager:
         except Exception as e:
             # Log error but don't fail the operation since PostgreSQL was updated
             # This is part of the data consistency issue mentioned in IMPLEMENTATION_ISSUES.md
-            pass
+            logger.warning(f"Qdrant update failed for memory {memory_id}: {e}")
+        
+        # Invalidate only after Qdrant is updated, so a concurrent search can't re-cache stale results
+        self.query_cache.invalidate(user_id)
         
         return f"Memory {memory_id} updated successfully"
 
@@ -145,8 +266,6 @@ class MemoryManager:
         """
         Deletes a memory from both vector and relational databases.
         """
-        from src.crud.crud_memory import delete_memory
-        
         # Validate user_id is provided
         if user_id is None:
             raise UserContextError(
@@ -154,9 +273,13 @@ class MemoryManager:
                 operation="delete_memory"
             )
         
-        # Delete from PostgreSQL first
+        await self._relax_commit_durability(db)
+        
+        # Delete from PostgreSQL first. It is the source of truth, so the vector is only
+        # removed once the row is gone; deleting both at once would drop the vector of a
+        # row that survives a failed PostgreSQL delete, leaving it unsearchable.
         try:
-            success = await delete_memory(
+            success = await crud_delete_memory(
                 db=db,
                 memory_id=uuid.UUID(memory_id),
                 user_id=user_id
@@ -181,10 +304,13 @@ class MemoryManager:
         try:
             await self.vector_store.delete_memory(memory_id, user_id)
         except Exception as e:
-            # Log error but don't fail since PostgreSQL deletion succeeded
+            # Don't fail since PostgreSQL deletion succeeded
             # This maintains partial consistency - the memory is removed from PostgreSQL
             # even if Qdrant deletion fails
-            pass
+            logger.warning(f"Qdrant delete failed for memory {memory_id}: {e}")
+        
+        # Invalidate only after Qdrant is updated, so a concurrent search can't re-cache stale results
+        self.query_cache.invalidate(user_id)
         
         return f"Memory {memory_id} deleted successfully"
 
@@ -192,9 +318,6 @@ class MemoryManager:
         """
         Delete all memories for a user from both PostgreSQL and Qdrant, plus processed profile.
         """
-        from src.crud.crud_memory import delete_all_user_memories
-        from src.crud.crud_processed_user_profile import delete_processed_user_profile
-        
         # Validate user_id is provided
         if user_id is None:
             raise UserContextError(
@@ -202,9 +325,11 @@ class MemoryManager:
                 operation="delete_all_memories"
             )
         
-        # Delete from PostgreSQL first
+        await self._relax_commit_durability(db)
+        
+        # Delete from PostgreSQL first; the returned IDs drive a single delete-by-ID in Qdrant
         try:
-            postgres_count = await delete_all_user_memories(db=db, user_id=user_id)
+            deleted_ids = await delete_all_user_memories_returning_ids(db=db, user_id=user_id)
         except Exception as e:
             raise DatabaseOperationError(
                 message="Failed to delete all memories from relational database",
@@ -212,15 +337,23 @@ class MemoryManager:
                 table_name="memories",
                 original_exception=e
             )
+        postgres_count = len(deleted_ids)
         
-        # Delete from Qdrant
+        # Delete from Qdrant. Fall back to the user filter when there are no IDs (cleans up
+        # vectors orphaned by earlier partial failures) or too many for one request payload.
         qdrant_count = 0
         try:
-            qdrant_count = await self.vector_store.delete_all_user_memories(user_id)
+            if 0 < postgres_count <= QDRANT_DELETE_BY_ID_LIMIT:
+                qdrant_count = await self.vector_store.delete_memories_bulk(deleted_ids, user_id)
+            else:
+                qdrant_count = await self.vector_store.delete_all_user_memories(user_id)
         except Exception as e:
-            # Log error but don't fail since PostgreSQL deletion succeeded
+            # Don't fail since PostgreSQL deletion succeeded
             # This maintains partial consistency - memories are removed from PostgreSQL
-            pass
+            logger.warning(f"Qdrant bulk delete failed for user {user_id}: {e}")
+        
+        # Invalidate only after Qdrant is updated, so a concurrent search can't re-cache stale results
+        self.query_cache.invalidate(user_id)
         
         # Delete processed user profile
         profile_deleted = False
@@ -233,6 +366,53 @@ class MemoryManager:
         profile_msg = " and processed profile" if profile_deleted else ""
         return f"Deleted {postgres_count} memories from PostgreSQL, {qdrant_count} from Qdrant{profile_msg}"
 
+    async def _relax_commit_durability(self, db: AsyncSession) -> None:
+        """Skip the WAL flush at commit for this transaction when MEMORY_ASYNC_COMMIT is on."""
+        if MEMORY_ASYNC_COMMIT:
+            await db.execute(_ASYNC_COMMIT_STMT)
+
+    async def _copy_memories(
+        self,
+        db: AsyncSession,
+        user_id: uuid.UUID,
+        rows: list[tuple[uuid.UUID, str, list[str]]]
+    ) -> None:
+        """
+        Write memory rows with asyncpg's COPY protocol, inside the session's transaction.
+
+        COPY runs in a savepoint so that, if it is rejected, the same rows can still be
+        written with a multi-row INSERT. created_at/updated_at come from server defaults.
+        """
+        try:
+            async with db.begin_nested():
+                connection = await db.connection()
+                raw_connection = await connection.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    Memory.__tablename__,
+                    records=[
+                        (memory_id, content, json.dumps(tags), user_id)
+                        for memory_id, content, tags in rows
+                    ],
+                    columns=["id", "content", "tags", "user_id"]
+                )
+        except Exception as e:
+            logger.warning(f"COPY into memories failed, falling back to INSERT: {e}")
+            async with db.begin_nested():
+                await db.execute(
+                    _INSERT_MEMORY,
+                    [
+                        {"id": memory_id, "content": content, "tags": tags, "user_id": user_id}
+                        for memory_id, content, tags in rows
+                    ]
+                )
+
+    async def _prefetch_embedding(self, content: str) -> None:
+        """Warm the embedding cache for content; failures surface later on the real upsert."""
+        try:
+            await self.vector_store.embed(content)
+        except Exception:
+            pass
+
     async def process_context(self, prompt: str, user_id: uuid.UUID, tags: Optional[list[str]] = None) -> str:
         """Record the user's message and return the synthesized profile."""
         # Validate user_id is provided
@@ -267,46 +447,109 @@ class MemoryManager:
                 operation="store_batch"
             )
         
+        await self._relax_commit_durability(db)
+        
         total = len(memories)
-        successful = 0
-        failed = 0
         
         if ctx:
             await ctx.info(f"Starting batch storage of {total} memories")
         
-        for i, memory_data in enumerate(memories):
-            if ctx:
-                await ctx.report_progress(progress=i, total=total)
+        # Reject malformed entries locally before paying for any embedding or DB work
+        valid, errors = _normalize_batch(memories)
+        successful = 0
+        failed = len(errors)
+        # Failures are collected and reported once at the end; progress is coalesced to
+        # about 20 notifications for the whole batch
+        failures = [f"item {index + 1}: {reason}" for index, reason in errors]
+        progress_tick = max(1, total // 20)
+        last_reported = 0
+        
+        all_memory_ids = [uuid.uuid4() for _ in valid]
+        
+        # Chunks embed and upsert concurrently (bounded by the semaphore) while their
+        # inserts are serialized, since an AsyncSession cannot run statements in parallel.
+        # Large batches instead stage their rows and write them with one COPY at the end.
+        semaphore = asyncio.Semaphore(STORE_BATCH_CONCURRENCY)
+        db_lock = asyncio.Lock()
+        use_copy = len(valid) > STORE_BATCH_COPY_THRESHOLD
+        staged_rows: list[tuple[uuid.UUID, str, list[str]]] = []
+        processed = len(errors)
+        
+        async def store_chunk(start: int) -> None:
+            nonlocal successful, failed, processed, last_reported
+            chunk = valid[start:start + STORE_BATCH_CHUNK_SIZE]
+            contents = [content for content, _ in chunk]
+            tags_list = [tags for _, tags in chunk]
+            memory_ids = all_memory_ids[start:start + STORE_BATCH_CHUNK_SIZE]
             
             try:
-                content = memory_data.get('content', '')
-                tags = memory_data.get('tags', [])
-                
-                # Generate a UUID for this memory
-                memory_id = str(uuid.uuid4())
+                # One embedding call and one upsert for the whole chunk
+                async with semaphore:
+                    await self.vector_store.store_memories_bulk(memory_ids, contents, user_id, tags_list)
                 
-                # Store in vector database
-                await self.vector_store.store_memory(memory_id, content, user_id, tags)
-                
-                # Store in relational database
-                db_memory = Memory(
-                    id=uuid.UUID(memory_id),
-                    content=content,
-                    tags=tags or [],
-                    user_id=user_id
-                )
-                db.add(db_memory)
-                successful += 1
+                if use_copy:
+                    staged_rows.extend(zip(memory_ids, contents, tags_list))
+                else:
+                    # Single multi-row insert into the relational database, in a savepoint so a
+                    # rejected chunk doesn't abort the whole transaction
+                    async with db_lock:
+                        try:
+                            async with db.begin_nested():
+                                await db.execute(
+                                    _INSERT_MEMORY,
+                                    [
+                                        {
+                                            "id": memory_id,
+                                            "content": content,
+                                            "tags": tags,
+                                            "user_id": user_id
+                                        }
+                                        for memory_id, content, tags in zip(memory_ids, contents, tags_list)
+                                    ]
+                                )
+                        except Exception:
+                            # Don't leave the chunk's vectors orphaned in Qdrant
+                            try:
+                                await self.vector_store.delete_memories_bulk(memory_ids, user_id)
+                            except Exception:
+                                pass
+                            raise
+                    successful += len(chunk)
                 
             except Exception as e:
-                failed += 1
-                if ctx:
-                    await ctx.warning(f"Failed to store memory {i+1}: {str(e)}")
+                failed += len(chunk)
+                failures.append(f"{len(chunk)} memories: {str(e)}")
+            
+            processed += len(chunk)
+            if ctx and processed - last_reported >= progress_tick:
+                last_reported = processed
+                await ctx.report_progress(progress=processed, total=total)
+        
+        await asyncio.gather(*(store_chunk(start) for start in range(0, len(valid), STORE_BATCH_CHUNK_SIZE)))
+        
+        if staged_rows:
+            try:
+                await self._copy_memories(db, user_id, staged_rows)
+                successful += len(staged_rows)
+            except Exception as e:
+                failed += len(staged_rows)
+                failures.append(f"{len(staged_rows)} memories: {str(e)}")
+                # Don't leave the staged vectors orphaned in Qdrant
+                try:
+                    await self.vector_store.delete_memories_bulk([row[0] for row in staged_rows], user_id)
+                except Exception:
+                    pass
         
         await db.flush()
+        self.query_cache.invalidate(user_id)
         
         if ctx:
             await ctx.report_progress(progress=total, total=total)
+            if failures:
+                await ctx.warning(
+                    f"Failed to store {failed} memories:\n"
+                    + "\n".join(failures[:50])
+                )
             await ctx.info(f"Batch storage complete: {successful} successful, {failed} failed")
         
-        return f"Stored {successful} memories, {failed} failed"
\ No newline at end of file
+        return f"Stored {successful} memories, {failed} failed"
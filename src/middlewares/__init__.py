@@ -1,6 +1,14 @@
-from .mcp_auth_middleware import UserCredentialMiddleware
 from .mcp_path_auth_middleware import MCPPathAuthMiddleware
 from .mcp_oauth_hint_middleware import MCPOAuthHintMiddleware
 from .mcp_oauth_redirect_middleware import MCPOAuthRedirectMiddleware
 
 __all__ = ["UserCredentialMiddleware", "MCPPathAuthMiddleware", "MCPOAuthHintMiddleware", "MCPOAuthRedirectMiddleware"]
+
+
+def __getattr__(name):
+    # The deprecated UserCredentialMiddleware is no longer mounted anywhere, so it is
+    # only imported if something still asks for it
+    if name == "UserCredentialMiddleware":
+        from .mcp_auth_middleware import UserCredentialMiddleware
+        return UserCredentialMiddleware
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
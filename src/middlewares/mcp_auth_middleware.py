@@ -1,17 +1,67 @@
 import os
 import logging
-from starlette.requests import Request
-from starlette.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Callable, Awaitable, Optional
 from src.db.database import get_async_sessionmaker
-from src.crud.crud_user import get_user_by_api_key
+from src.core.security import is_well_formed_api_key
+from src.crud.crud_user import get_api_key_auth_snapshot
 from src.exceptions import InvalidAPIKeyError, InactiveUserError
 from src.exceptions.handlers import ExceptionHandler
+from src.utils.api_key_cache import api_key_cache
+from src.utils.log_rate_limiter import auth_failure_log_limiter
 
 
 logger = logging.getLogger(__name__)
 
-class UserCredentialMiddleware(BaseHTTPMiddleware):
+_MCP_PREFIX = "/mcp/"
+_MCP_PREFIX_LEN = len(_MCP_PREFIX)
+_MCP_PREFIX_BYTES = _MCP_PREFIX.encode()
+_HEALTH = "health"
+_JSON_CONTENT_TYPE = (b"content-type", b"application/json")
+
+# Read once at import; request handling branches on this instead of building debug strings
+_DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+
+async def _send_exception(send, exception) -> None:
+    """Send the JSON error response for exception as raw ASGI messages."""
+    status_code, body = ExceptionHandler.to_json_body(exception)
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [_JSON_CONTENT_TYPE, (b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _key_prefix(api_key: str) -> str:
+    return api_key[:10] + "..." if len(api_key) > 10 else api_key
+
+
+async def _deny(scope, send, exception, api_key: str, user_id: Optional[str] = None) -> None:
+    """Log the rejected request as a security event (rate limited) and send the error response."""
+    key_prefix = _key_prefix(api_key)
+    client = scope.get("client")
+    should_log, suppressed = auth_failure_log_limiter.allow(
+        f"{client[0] if client else '-'}|{key_prefix}", type(exception).__name__
+    )
+    if should_log:
+        additional_context = {
+            "path": scope["path"],
+            "api_key_prefix": key_prefix
+        }
+        if suppressed:
+            additional_context["suppressed_since_last_log"] = suppressed
+        ExceptionHandler.log_exception(
+            exception=exception,
+            operation="mcp_auth_middleware",
+            user_id=user_id,
+            additional_context=additional_context
+        )
+    await _send_exception(send, exception)
+
+
+class UserCredentialMiddleware:
     """
     DEPRECATED: This middleware is deprecated in favor of MCPPathAuthMiddleware.
 
@@ -21,86 +71,90 @@ class UserCredentialMiddleware(BaseHTTPMiddleware):
     Use MCPPathAuthMiddleware instead, which:
     - Supports both header-based (Authorization: Bearer) and path-based auth
     - Properly rewrites paths for FastMCP route matching
-    - Uses modern ASGI middleware pattern
+
+    Implemented as plain ASGI (like MCPPathAuthMiddleware) rather than BaseHTTPMiddleware,
+    so requests are not relayed through an extra task and memory stream.
 
     This class is retained for reference only and should not be used in new code.
     See: src/middlewares/mcp_path_auth_middleware.py
     """
-    def __init__(self, app):
-        super().__init__(app)
-        self.debug = os.getenv("DEBUG", "false").lower() == "true"
+    def __init__(self, app: Callable[[dict, Callable, Callable], Awaitable[None]]):
+        self.app = app
+        # Bound on first use: sessionmakers are per event loop, and a middleware instance
+        # only ever serves the loop of the server it is mounted in
+        self._session_maker = None
     
-    async def dispatch(self, request: Request, call_next):
-        # Extract user credential (API key) from path
-        path = request.url.path
-        if path.startswith("/mcp/"):
-            api_key = path.split("/mcp/")[1].split("/")[0] if len(path.split("/mcp/")[1].split("/")) > 0 else None
-            
-            # Remove "/mcp/" prefix and handle health checks
-            if api_key and api_key != "health":
-                if self.debug:
-                    logger.debug(f"Processing API key from path: {api_key[:10]}...")
-                
-                # Validate API key against database using event-loop-specific session
-                session_maker = get_async_sessionmaker()
-                async with session_maker() as db:
-                    user = await get_user_by_api_key(db, api_key)
-                    if user:
-                        if user.is_active:
-                            if self.debug:
-                                logger.debug(
-                                    f"✅ Authorized user: {user.username} (ID: {user.id}, "
-                                    f"Superuser: {user.is_superuser}, "
-                                    f"API Key Created: {user.api_key_created_at})"
-                                )
-                            
-                            # Store user info in request state for later use
-                            request.state.user = user
-                            # No longer setting global context - user_id passed explicitly
-                        else:
-                            if self.debug:
-                                logger.warning(f"❌ Inactive user attempted access: {user.username} ({user.email})")
-                            
-                            exception = InactiveUserError(
-                                user_id=str(user.id),
-                                username=user.username
-                            )
-                            
-                            # Log the security event
-                            ExceptionHandler.log_exception(
-                                exception=exception,
-                                operation="mcp_auth_middleware",
-                                user_id=str(user.id),
-                                additional_context={
-                                    "path": path,
-                                    "api_key_prefix": api_key[:10] + "..." if len(api_key) > 10 else api_key
-                                }
-                            )
-                            
-                            return ExceptionHandler.to_json_response(exception)
-                    else:
-                        if self.debug:
-                            logger.warning(f"❌ Invalid API key attempted: {api_key[:10]}...")
-                        
-                        exception = InvalidAPIKeyError(
-                            api_key_prefix=api_key[:10] + "..." if len(api_key) > 10 else api_key
-                        )
-                        
-                        # Log the security event
-                        ExceptionHandler.log_exception(
-                            exception=exception,
-                            operation="mcp_auth_middleware",
-                            additional_context={
-                                "path": path,
-                                "api_key_prefix": api_key[:10] + "..." if len(api_key) > 10 else api_key
-                            }
-                        )
-                        
-                        return ExceptionHandler.to_json_response(exception)
-            else:
-                if self.debug:
-                    logger.debug(f"Health check or no API key required for path: {path}")
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        # Fast paths: non-MCP routes, /mcp/health and a missing key never touch the cache or DB.
+        # raw_path is the undecoded request target, so most non-MCP traffic is turned away with
+        # one bytes comparison; the decoded path is still checked since keys are read from it
+        raw_path = scope.get("raw_path")
+        if raw_path is not None and not raw_path.startswith(_MCP_PREFIX_BYTES):
+            return await self.app(scope, receive, send)
+        path = scope["path"]
+        if not path.startswith(_MCP_PREFIX):
+            return await self.app(scope, receive, send)
+        
+        # CORS preflights carry no credentials and never run a tool; whatever handles
+        # OPTIONS downstream answers them without an auth lookup
+        if scope["method"] == "OPTIONS":
+            return await self.app(scope, receive, send)
+        
+        # First segment after "/mcp/": one scan for the next slash, no intermediate lists
+        slash = path.find("/", _MCP_PREFIX_LEN)
+        api_key = path[_MCP_PREFIX_LEN:] if slash == -1 else path[_MCP_PREFIX_LEN:slash]
+        if not api_key or api_key == _HEALTH:
+            if _DEBUG:
+                logger.debug("Health check or no API key required for path: %s", path)
+            return await self.app(scope, receive, send)
+        
+        if _DEBUG:
+            logger.debug("Processing API key from path: %s...", api_key[:10])
+        
+        # Anything that can't be one of our keys is rejected before the cache or database
+        if not is_well_formed_api_key(api_key):
+            return await _deny(scope, send, InvalidAPIKeyError(api_key_prefix=_key_prefix(api_key)), api_key)
+        
+        # Serve hot keys from the in-process cache; otherwise validate against the
+        # database, releasing the connection back to the pool before building the response
+        # (unknown keys are negatively cached for a few seconds)
+        hit, user = api_key_cache.lookup(api_key)
+        if not hit:
+            session_maker = self._session_maker
+            if session_maker is None:
+                session_maker = self._session_maker = get_async_sessionmaker()
+            async with session_maker() as db:
+                db_user = await get_api_key_auth_snapshot(db, api_key)
+            user = api_key_cache.put(api_key, db_user)
+        
+        if user is None:
+            if _DEBUG:
+                logger.warning("❌ Invalid API key attempted: %s...", api_key[:10])
+            exception = InvalidAPIKeyError(api_key_prefix=_key_prefix(api_key))
+            return await _deny(scope, send, exception, api_key)
+        
+        if not user.is_active:
+            if _DEBUG:
+                logger.warning("❌ Inactive user attempted access: %s (%s)", user.username, user.email)
+            exception = InactiveUserError(
+                user_id=str(user.id),
+                username=user.username
+            )
+            return await _deny(scope, send, exception, api_key, user_id=str(user.id))
+        
+        if _DEBUG:
+            logger.debug(
+                "✅ Authorized user: %s (ID: %s, Superuser: %s, API Key Created: %s)",
+                user.username, user.id, user.is_superuser, user.api_key_created_at
+            )
+        
+        # Store user info in request state for later use; user_id is passed explicitly
+        # downstream, so no context variables are set here
+        scope.setdefault("state", {})
+        scope["state"]["user"] = user
         
         # Continue to the next middleware/route
-        response = await call_next(request)
-        return response 
\ No newline at end of file
+        return await self.app(scope, receive, send)
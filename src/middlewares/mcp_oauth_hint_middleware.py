@@ -1,9 +1,31 @@
 import os
 import logging
+from functools import lru_cache
 from typing import Callable, Awaitable
 
 logger = logging.getLogger(__name__)
 
+# The MCP endpoint root, with or without trailing slash, as raw path bytes
+_MCP_ROOTS = (b"/mcp", b"/mcp/")
+
+_JSON_CONTENT_TYPE = (b"content-type", b"application/json")
+_CONTENT_LENGTH_ZERO = (b"content-length", b"0")
+
+
+@lru_cache(maxsize=64)
+def _build_401_headers(scheme: bytes, host: bytes) -> list[tuple[bytes, bytes]]:
+    """Build the 401 response headers; the metadata URL only varies by scheme and host."""
+    # Always use /mcp (no trailing slash) for metadata URL
+    # FastMCP serves .well-known endpoints without trailing slash
+    metadata_url = b"%s://%s/.well-known/oauth-protected-resource/mcp" % (scheme, host)
+
+    # 401 with WWW-Authenticate per RFC specs used by FastMCP clients
+    www_authenticate = (
+        b"Bearer error=\"invalid_token\", error_description=\"Authentication required\", "
+        b"resource_metadata=\"%s\"" % metadata_url
+    )
+    return [_JSON_CONTENT_TYPE, _CONTENT_LENGTH_ZERO, (b"www-authenticate", www_authenticate)]
+
 
 class MCPOAuthHintMiddleware:
     """
@@ -21,45 +43,50 @@ class MCPOAuthHintMiddleware:
         if scope.get("type") != "http":
             return await self.app(scope, receive, send)
 
-        path: str = scope.get("path", "")
-        headers = {k.decode().lower(): v.decode() for k, v in scope.get("headers", [])}
+        # Hint only on the MCP endpoint root; compared on raw_path so nothing is decoded
+        raw_path = scope.get("raw_path")
+        if raw_path is None:
+            raw_path = scope.get("path", "").encode()
+        if raw_path not in _MCP_ROOTS:
+            return await self.app(scope, receive, send)
+
+        # ASGI header names are lowercase bytes; pick out only the ones needed. Any credential
+        # header means the request passes through, so the scan stops at the first one.
+        authorization = x_api_key = host = forwarded_proto = None
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                authorization = value
+                break
+            elif name == b"x-api-key":
+                x_api_key = value
+                break
+            elif name == b"host":
+                host = value
+            elif name == b"x-forwarded-proto":
+                forwarded_proto = value
 
         # Already presenting credentials? Let downstream handle it
-        has_auth_header = any(h.lower() == "authorization" for h in headers.keys())
-        has_x_api_key = "x-api-key" in headers
-
-        # Hint only on the MCP endpoint root (with or without trailing slash), without any credentials
-        if path in ("/mcp", "/mcp/") and not has_auth_header and not has_x_api_key:
-            logger.debug(f"[OAUTH_HINT] No credentials provided, returning 401 with OAuth hint")
-            # Compute absolute metadata URL - always without trailing slash
-            # FastMCP serves .well-known endpoints without trailing slash
-            scheme = (headers.get("x-forwarded-proto") or "http").split(",")[0].strip()
-            host = headers.get("host", "localhost:4200")
-            # Always use /mcp (no trailing slash) for metadata URL
-            metadata_url = f"{scheme}://{host}/.well-known/oauth-protected-resource/mcp"
-
-            # 401 with WWW-Authenticate per RFC specs used by FastMCP clients
-            www_authenticate = (
-                f"Bearer error=\"invalid_token\", error_description=\"Authentication required\", "
-                f"resource_metadata=\"{metadata_url}\""
-            )
-
-            await send(
-                {
-                    "type": "http.response.start",
-                    "status": 401,
-                    "headers": [
-                        (b"content-type", b"application/json"),
-                        (b"content-length", b"0"),
-                        (b"www-authenticate", www_authenticate.encode()),
-                    ],
-                }
-            )
-            await send({"type": "http.response.body", "body": b""})
-            return
-        elif path in ("/mcp", "/mcp/"):
-            auth_preview = headers.get("authorization", "None")[:50] if headers.get("authorization") else "None"
-            logger.debug(f"[OAUTH_HINT] Has credentials - auth_header={has_auth_header}, x_api_key={has_x_api_key}, preview={auth_preview}")
-
-        return await self.app(scope, receive, send)
+        if authorization is not None or x_api_key is not None:
+            # Only decode the preview when a debug handler will actually see it
+            if logger.isEnabledFor(logging.DEBUG):
+                auth_preview = authorization[:50].decode("latin-1") if authorization else "None"
+                logger.debug(
+                    "[OAUTH_HINT] Has credentials - auth_header=%s, x_api_key=%s, preview=%s",
+                    authorization is not None, x_api_key is not None, auth_preview
+                )
+            return await self.app(scope, receive, send)
+
+        logger.debug("[OAUTH_HINT] No credentials provided, returning 401 with OAuth hint")
+        # Compute absolute metadata URL from the (possibly proxied) scheme and host
+        scheme = (forwarded_proto or b"http").split(b",")[0].strip()
+        headers = _build_401_headers(scheme, host or b"localhost:4200")
 
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 401,
+                # Copy so a downstream server mutating the list can't corrupt the cached one
+                "headers": list(headers),
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
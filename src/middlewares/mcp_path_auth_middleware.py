@@ -1,22 +1,75 @@
+import asyncio
 import logging
 import os
-from typing import Callable, Awaitable
+from typing import Callable, Awaitable, Optional
 
-from starlette.requests import Request
-from starlette.responses import JSONResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from src.db.database import get_async_sessionmaker
-from src.crud.crud_user import get_user_by_api_key, get_user_by_username
+from src.crud.crud_user import get_api_key_auth_snapshot, get_username_auth_snapshot
 from src.core import security
 from starlette.authentication import AuthCredentials
 from mcp.server.auth.provider import AccessToken as SDKAccessToken
 from mcp.server.auth.middleware.bearer_auth import AuthenticatedUser
 from src.exceptions import InvalidAPIKeyError, InactiveUserError
 from src.exceptions.handlers import ExceptionHandler
+from src.utils.api_key_cache import CachedUser, api_key_cache
+from src.utils.jwt_cache import jwt_cache, verify_token
 
 
 logger = logging.getLogger(__name__)
 
+# Read once at import rather than per middleware instance
+_DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+
+
+def _noop(*args, **kwargs) -> None:
+    pass
+
+
+# DEBUG-gated logging: bound once to the logger or to a no-op, so call sites need no branch
+_dbg = logger.debug if _DEBUG else _noop
+_warn = logger.warning if _DEBUG else _noop
+
+_MCP_ROOT = b"/mcp"
+_MCP_PREFIX = b"/mcp/"
+_MCP_PREFIX_LEN = len(_MCP_PREFIX)
+_BEARER = b"bearer "
+_BEARER_LEN = len(_BEARER)
+_LEGACY_KEY_PATH_PREFIX = "/mcp/" + security.API_KEY_PREFIX
+
+
+def _looks_like_jwt(token: str) -> bool:
+    """True if token contains at least two dots (JWS/JWE shape); stops scanning at the second."""
+    return token.find(".", token.find(".") + 1) != -1
+
+
+def _authorize(scope: dict, token: str, user: CachedUser, expires_at: Optional[int] = None) -> None:
+    """Attach the authenticated user for tools (request.state.user) and for the MCP SDK."""
+    scope.setdefault("state", {})
+    scope["state"]["user"] = user
+    _inject_sdk_auth(scope, token, user, expires_at=expires_at)
+
+
+async def _reject(scope, receive, send, exception) -> None:
+    response = ExceptionHandler.to_json_response(exception)
+    await response(scope, receive, send)
+
+
+def _inject_sdk_auth(scope: dict, token: str, user: CachedUser, scopes: tuple[str, ...] = ("user",), expires_at: Optional[int] = None) -> None:
+    """
+    Mark the request as authenticated for the MCP SDK, so FastMCP's RequireAuthMiddleware
+    accepts it without validating the bearer again.
+    """
+    access = SDKAccessToken(
+        token=token,
+        client_id=str(user.id),
+        scopes=list(scopes),
+        expires_at=expires_at,
+    )
+    scope["user"] = AuthenticatedUser(access)
+    scope["auth"] = AuthCredentials(list(scopes))
+
 
 class MCPPathAuthMiddleware:
     """
@@ -28,108 +81,175 @@ class MCPPathAuthMiddleware:
 
     def __init__(self, app: Callable[[dict, Callable, Callable], Awaitable[None]]):
         self.app = app
-        self.debug = os.getenv("DEBUG", "false").lower() == "true"
+        # Bound on first use: sessionmakers are per event loop, and a middleware instance
+        # only ever serves the loop of the server it is mounted in
+        self._session_maker: Optional[async_sessionmaker] = None
+
+        # Cache-miss lookups currently running, so concurrent requests for the same cold key
+        # or subject share one query instead of each taking a pooled connection
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+
+    def _get_session_maker(self) -> async_sessionmaker:
+        session_maker = self._session_maker
+        if session_maker is None:
+            session_maker = self._session_maker = get_async_sessionmaker()
+        return session_maker
+
+    async def _single_flight(self, key: tuple[str, str], load: Callable[[], Awaitable[Optional[CachedUser]]]) -> Optional[CachedUser]:
+        """
+        Run load() once per key at a time; concurrent callers await the same task. The task
+        is shielded so a caller that disconnects doesn't cancel the lookup for the others.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load_api_key_user(self, api_key: str) -> Optional[CachedUser]:
+        async with self._get_session_maker()() as db:
+            db_user = await get_api_key_auth_snapshot(db, api_key)
+        # Caches unknown keys too, for the negative TTL
+        return api_key_cache.put(api_key, db_user)
+
+    async def _load_subject_user(self, username: str) -> Optional[CachedUser]:
+        async with self._get_session_maker()() as db:
+            db_user = await get_username_auth_snapshot(db, username)
+        return CachedUser.from_user(db_user) if db_user else None
 
     async def __call__(self, scope, receive, send):
         if scope.get("type") != "http":
             return await self.app(scope, receive, send)
 
+        # Only the MCP endpoint is authenticated here; OAuth discovery/callback routes and
+        # /health pass straight through without any header parsing. The check runs on the
+        # undecoded raw_path bytes when the server provides them (the prefix is ASCII).
+        raw_path = scope.get("raw_path")
+        if raw_path is None:
+            raw_path = scope.get("path", "").encode()
+        if not (raw_path == _MCP_ROOT or raw_path.startswith(_MCP_PREFIX)):
+            return await self.app(scope, receive, send)
         path: str = scope.get("path", "")
-        headers = {k.decode().lower(): v.decode() for k, v in scope.get("headers", [])}
+
+        # Already authorized by an earlier pass over this same scope (_authorize sets both),
+        # e.g. a re-dispatched request: nothing left to parse or look up. Legacy key paths
+        # still go through, since their rewrite applies to a copy of the scope.
+        if (
+            isinstance(scope.get("user"), AuthenticatedUser)
+            and scope.get("state", {}).get("user") is not None
+            and not path.startswith(_LEGACY_KEY_PATH_PREFIX)
+        ):
+            return await self.app(scope, receive, send)
+
+        # Only two headers matter here; ASGI header names are already lowercase bytes, so
+        # match them directly (Authorization stays bytes until its scheme is checked)
+        auth_header = None
+        x_api_key = None
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                auth_header = value
+            elif name == b"x-api-key":
+                x_api_key = value.decode("latin-1")
+            else:
+                continue
+            if auth_header is not None and x_api_key is not None:
+                break
+
+        # Checked once per request so disabled debug logging costs no formatting or slicing
+        log_debug = logger.isEnabledFor(logging.DEBUG)
 
         # Extract credentials from Authorization header
         api_key = None
         jwt_token = None
-        auth_header = headers.get("authorization")
-        if auth_header and auth_header.lower().startswith("bearer "):
-            bearer = auth_header.split(" ", 1)[1].strip()
-            # First, try to decode as our own JWT
-            token_data = security.decode_token(bearer)
-            if token_data and token_data.sub:
-                jwt_token = bearer
-                logger.debug(f"[AUTH] Identified as internal JWT for user: {token_data.sub}")
-            else:
-                # If it looks like a JWT (contains at least 2 dots), assume FastMCP OAuth token
-                # and do NOT treat it as an API key. Let FastMCP auth handle it downstream.
-                if bearer.count('.') >= 2:
-                    logger.debug(f"[AUTH] Token has {bearer.count('.')} dots - passing to FastMCP OAuth validation")
-                    pass  # leave both jwt_token and api_key as None
+        jwt_user = None
+        # Case-insensitive scheme check on the 7-byte prefix only, not a lowered copy of the token
+        if auth_header and auth_header[:_BEARER_LEN].lower() == _BEARER:
+            bearer = auth_header[_BEARER_LEN:].strip().decode("latin-1")
+            if bearer.startswith(security.API_KEY_PREFIX):
+                # Our API keys are never JWTs, so skip the decode entirely
+                api_key = bearer
+                if log_debug:
+                    logger.debug("[AUTH] Token identified as API key: %s...", api_key[:10])
+            elif _looks_like_jwt(bearer):
+                # Try our own JWT first: a recently seen token is served from the cache (as
+                # valid or as known-invalid), otherwise decoded once and the outcome cached
+                token_data, jwt_user = verify_token(bearer)
+                if token_data:
+                    jwt_token = bearer
+                    if log_debug:
+                        logger.debug("[AUTH] Identified as internal JWT for user: %s", token_data.sub)
                 else:
-                    # Legacy behavior: allow API key in Bearer header
-                    api_key = bearer
-                    logger.debug(f"[AUTH] Token identified as API key: {api_key[:10]}...")
+                    # Any other JWT is assumed to be a FastMCP OAuth token and is NOT treated
+                    # as an API key. Let FastMCP auth handle it downstream.
+                    if log_debug:
+                        logger.debug("[AUTH] Token is not an internal JWT - passing to FastMCP OAuth validation")
+            else:
+                # Legacy behavior: allow API key in Bearer header
+                api_key = bearer
+                if log_debug:
+                    logger.debug("[AUTH] Token identified as API key: %s...", api_key[:10])
         # Also support X-API-Key header
-        if not api_key and not jwt_token and headers.get("x-api-key"):
-            api_key = headers.get("x-api-key")
-            logger.debug(f"[AUTH] Using X-API-Key header: {api_key[:10]}...")
-
-        # Legacy path-based auth: /mcp/{api_key}/...
-        if path.startswith("/mcp/"):
-            remainder = path[len("/mcp/"):]
-            if remainder:
-                first, _, tail = remainder.partition("/")
-                # Only treat as API key if it looks like our keys (e.g., starts with sk_)
-                if first.startswith("sk_") and not api_key:
-                    api_key = first
-                    new_path = "/mcp" + ("/" + tail if tail else "")
-                    if new_path != path:
-                        if self.debug:
-                            logger.debug(f"Rewriting MCP path from {path} -> {new_path}")
-                        scope = dict(scope)
-                        scope["path"] = new_path
-                        scope["raw_path"] = new_path.encode()
+        if not api_key and not jwt_token and x_api_key:
+            api_key = x_api_key
+            if log_debug:
+                logger.debug("[AUTH] Using X-API-Key header: %s...", api_key[:10])
+
+        # Legacy path-based auth: /mcp/{api_key}/... Only treat the first segment as an API key
+        # if it looks like our keys (starts with sk_); one scan finds where it ends
+        rewritten_path = None
+        if not api_key and path.startswith(_LEGACY_KEY_PATH_PREFIX):
+            slash = path.find("/", _MCP_PREFIX_LEN)
+            if slash == -1:
+                api_key = path[_MCP_PREFIX_LEN:]
+                rewritten_path = "/mcp"
+            else:
+                api_key = path[_MCP_PREFIX_LEN:slash]
+                rewritten_path = "/mcp" + path[slash:] if slash + 1 < len(path) else "/mcp"
 
         if jwt_token:
-            token_data = security.decode_token(jwt_token)
-            if token_data and token_data.sub:
-                session_maker = get_async_sessionmaker()
-                async with session_maker() as db:
-                    user = await get_user_by_username(db, username=token_data.sub)
-                    if user:
-                        if user.is_active:
-                            scope.setdefault("state", {})
-                            scope["state"]["user"] = user
-                        else:
-                            exception = InactiveUserError(user_id=str(user.id), username=user.username)
-                            response = ExceptionHandler.to_json_response(exception)
-                            return await response(scope, receive, send)
-            # if token invalid, fall through to next checks
-        elif api_key:
-            session_maker = get_async_sessionmaker()
-            async with session_maker() as db:
-                user = await get_user_by_api_key(db, api_key)
+            # token_data was verified (or taken from the cache) when classifying the bearer
+            user = jwt_user
+            if user is None:
+                subject = token_data.sub
+                user = await self._single_flight(("sub", subject), lambda: self._load_subject_user(subject))
                 if user:
-                    if user.is_active:
-                        if self.debug:
-                            logger.debug(
-                                f"✅ Authorized user via MCP auth: {user.username} (ID: {user.id})"
-                            )
-                        scope.setdefault("state", {})
-                        scope["state"]["user"] = user
-                        # bypass FastMCP's RequireAuthMiddleware by providing a synthetic authenticated user
-                        access = SDKAccessToken(
-                            token=api_key,
-                            client_id=str(user.id),
-                            scopes=["user"],
-                            expires_at=None,
-                        )
-                        scope["user"] = AuthenticatedUser(access)
-                        scope["auth"] = AuthCredentials(["user"])
-                    else:
-                        if self.debug:
-                            logger.warning(
-                                f"❌ Inactive user attempted MCP access: {user.username} ({user.email})"
-                            )
-                        exception = InactiveUserError(user_id=str(user.id), username=user.username)
-                        response = ExceptionHandler.to_json_response(exception)
-                        return await response(scope, receive, send)
-                else:
-                    if self.debug:
-                        logger.warning("❌ Invalid API key attempted for MCP access")
-                    exception = InvalidAPIKeyError(
-                        api_key_prefix=api_key[:10] + "..." if len(api_key) > 10 else api_key
-                    )
-                    response = ExceptionHandler.to_json_response(exception)
-                    return await response(scope, receive, send)
+                    jwt_cache.set_user(jwt_token, user)
+            if user:
+                if not user.is_active:
+                    return await _reject(scope, receive, send, InactiveUserError(user_id=str(user.id), username=user.username))
+                _authorize(scope, jwt_token, user, expires_at=token_data.exp)
+        elif api_key:
+            if api_key.startswith(security.API_KEY_PREFIX) and not security.is_well_formed_api_key(api_key):
+                # Carries our prefix but can't be one of our keys: reject without taking a
+                # cache slot or a query (keys without the prefix keep the legacy lookup)
+                user = None
+            else:
+                # Hot keys are served from the shared in-process cache (also used by the API's
+                # key auth); misses read just the auth columns and cache the result, including
+                # unknown keys for a short negative TTL
+                hit, user = api_key_cache.lookup(api_key)
+                if not hit:
+                    user = await self._single_flight(("key", api_key), lambda: self._load_api_key_user(api_key))
+
+            if not user:
+                _warn("❌ Invalid API key attempted for MCP access")
+                exception = InvalidAPIKeyError(
+                    api_key_prefix=api_key[:10] + "..." if len(api_key) > 10 else api_key
+                )
+                return await _reject(scope, receive, send, exception)
+            if not user.is_active:
+                _warn("❌ Inactive user attempted MCP access: %s (%s)", user.username, user.email)
+                return await _reject(scope, receive, send, InactiveUserError(user_id=str(user.id), username=user.username))
+            _dbg("✅ Authorized user via MCP auth: %s (ID: %s)", user.username, user.id)
+            _authorize(scope, api_key, user)
+
+        if rewritten_path is not None:
+            # Applied only once the request is authorized, so rejected keys never pay for it.
+            # A copy is still required (the scope object is shared with the middlewares above
+            # us, and path/raw_path must only change for the app below), but it is built in
+            # one step with the two overrides rather than copied and then assigned into.
+            _dbg("Rewriting MCP path from %s -> %s", path, rewritten_path)
+            scope = {**scope, "path": rewritten_path, "raw_path": rewritten_path.encode()}
 
         return await self.app(scope, receive, send)
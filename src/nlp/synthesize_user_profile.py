@@ -1,101 +1,402 @@
 import os
+import asyncio
+import hashlib
 import logging
-from langchain_core.prompts import PromptTemplate
+import random
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import Optional
+from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
+import openai
 from pydantic import BaseModel
-from src.nlp.prompts import user_profile_synthesizer_prompt
+from src.nlp.prompts import get_user_profile_synthesizer_prompt
+from src.utils.redis_client import get_redis_client
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.request_rate_limiter import RequestRateLimiter
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:  # only present alongside the Gemini client
+    google_exceptions = None
 
 logger = logging.getLogger(__name__)
 
-# Try to initialize Google Gemini first, fall back to OpenAI if needed
-try:
-    _llm = ChatGoogleGenerativeAI(
-        temperature=0, 
-        model=os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
-        timeout=120,
-        max_retries=2
-    )
-    _using_openai = False
-    logger.info("Using Google Gemini model for profile synthesis")
-except Exception as e:
-    logger.warning(f"Failed to initialize Google Gemini: {e}. Falling back to OpenAI.")
-    if not os.getenv("OPENAI_API_KEY"):
-        raise ValueError("Neither GOOGLE_API_KEY nor OPENAI_API_KEY is configured")
-    
-    _llm = ChatOpenAI(
-        temperature=0,
-        model=os.getenv("OPENAI_MODEL", "gpt-5-mini"),
-        timeout=120,
-        max_retries=2
-    )
-    _using_openai = True
-    logger.info("Using OpenAI model for profile synthesis")
+_GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+_OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5-mini")
+
+# The prompt is several KB of static text around three slots, so it is split once (on first
+# use) and each call just joins the pieces; PromptTemplate would re-parse it per call
+_PROMPT_FIELDS = ("user_messages_chronological", "existing_metadata_json", "existing_summary_text")
+
+
+def _split_prompt(template: str, fields: tuple[str, ...]) -> tuple[str, ...]:
+    """Split a str.format-style template around fields (in order), unescaping the static text."""
+    parts = []
+    rest = template
+    for field in fields:
+        head, rest = rest.split("{" + field + "}", 1)
+        parts.append(head)
+    parts.append(rest)
+    return tuple(part.replace("{{", "{").replace("}}", "}") for part in parts)
 
-_prompt_template = PromptTemplate.from_template(user_profile_synthesizer_prompt)
+
+@lru_cache(maxsize=1)
+def _get_prompt_parts() -> tuple[str, ...]:
+    return _split_prompt(get_user_profile_synthesizer_prompt(), _PROMPT_FIELDS)
+
+
+def _format_prompt(inputs: dict) -> str:
+    head, after_messages, after_metadata, tail = _get_prompt_parts()
+    return "".join((
+        head, inputs["user_messages_chronological"],
+        after_messages, inputs["existing_metadata_json"],
+        after_metadata, inputs["existing_summary_text"],
+        tail,
+    ))
+
+
+# Prompt size drives both cost and latency, so only the most recent messages are sent once
+# the log grows past this many characters (0 disables the limit). The existing summary is
+# passed alongside and already carries what was learned from older messages.
+MAX_INPUT_CHARS = int(os.getenv("PROFILE_SYNTHESIS_MAX_INPUT_CHARS", "100000"))
+# Messages are joined by update_profile_background as "Timestamp: ...\nUser: ..." blocks
+_MESSAGE_BOUNDARY = "\n\nTimestamp: "
+_TRUNCATION_NOTE = "[Earlier messages omitted]\n\n"
+
+
+def _truncate_messages(user_messages_str: str, max_chars: int) -> str:
+    """Keep the newest messages that fit in max_chars, cutting on a message boundary if possible."""
+    if max_chars <= 0 or len(user_messages_str) <= max_chars:
+        return user_messages_str
+    cut = len(user_messages_str) - max_chars
+    boundary = user_messages_str.find(_MESSAGE_BOUNDARY, cut)
+    if boundary != -1:
+        cut = boundary + 2
+    return _TRUNCATION_NOTE + user_messages_str[cut:]
+
+
+_prompt_template = RunnableLambda(_format_prompt)
 _output_parser = StrOutputParser()
 
 class LLMAnalysisResult(BaseModel):
     user_profile_summary: str
     user_profile_metadata: str
 
-# Construct the chain
-_profile_synthesis_chain = _prompt_template | _llm.with_structured_output(LLMAnalysisResult)
+
+@lru_cache(maxsize=1)
+def _get_primary() -> tuple[Runnable, bool]:
+    """
+    Build the primary synthesis chain on first use, returning (chain, using_openai).
+
+    Deferred so importing this module (the API server does, via the Celery task module)
+    constructs no LLM client and needs no LLM credentials until a synthesis actually runs.
+    """
+    # Try to initialize Google Gemini first, fall back to OpenAI if needed
+    try:
+        llm = ChatGoogleGenerativeAI(
+            temperature=0, 
+            model=_GEMINI_MODEL,
+            timeout=120,
+            # Retried by _invoke/_ainvoke with jittered backoff instead
+            max_retries=0
+        )
+        using_openai = False
+        logger.info("Using Google Gemini model for profile synthesis")
+    except Exception as e:
+        logger.warning(f"Failed to initialize Google Gemini: {e}. Falling back to OpenAI.")
+        if not os.getenv("OPENAI_API_KEY"):
+            raise ValueError("Neither GOOGLE_API_KEY nor OPENAI_API_KEY is configured")
+        
+        llm = ChatOpenAI(
+            temperature=0,
+            model=_OPENAI_MODEL,
+            timeout=120,
+            # Retried by _invoke/_ainvoke with jittered backoff instead
+            max_retries=0
+        )
+        using_openai = True
+        logger.info("Using OpenAI model for profile synthesis")
+
+    # Construct the chain
+    return _prompt_template | llm.with_structured_output(LLMAnalysisResult), using_openai
+
+
+def _using_openai() -> bool:
+    return _get_primary()[1]
+
+# Synthesis runs at temperature 0, so identical inputs (task retries, re-syncs) reuse the
+# previous result from Redis instead of paying for another multi-second LLM call
+SYNTHESIS_CACHE_TTL = int(os.getenv("PROFILE_SYNTHESIS_CACHE_TTL_SECONDS", "3600"))
+
+
+@lru_cache(maxsize=1)
+def _get_key_digest() -> bytes:
+    # Folded into every key, so changing the prompt or either model (a result may come from
+    # the primary or the backup) invalidates results produced under the old configuration
+    parts = (*_get_prompt_parts(), _GEMINI_MODEL, _OPENAI_MODEL, str(_using_openai()))
+    return hashlib.sha256("\x00".join(parts).encode()).digest()
+
+
+def _synthesis_cache_key(payload: dict) -> str:
+    digest = hashlib.sha256(_get_key_digest())
+    for field in _PROMPT_FIELDS:
+        value = payload[field].encode()
+        # Length-prefixed so different splits of the same text can't collide
+        digest.update(len(value).to_bytes(8, "big"))
+        digest.update(value)
+    return f"llm:profile:{digest.hexdigest()}"
+
+
+def _get_cached_synthesis(key: str) -> Optional[LLMAnalysisResult]:
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return None
+
+    try:
+        cached = redis_client.get(key)
+        if cached:
+            return LLMAnalysisResult.model_validate_json(cached)
+    except Exception as e:
+        logger.warning("Failed to read cached profile synthesis: %s", e)
+
+    return None
+
+
+def _cache_synthesis(key: str, result: LLMAnalysisResult) -> None:
+    redis_client = get_redis_client()
+    if redis_client is None:
+        return
+
+    try:
+        redis_client.setex(key, SYNTHESIS_CACHE_TTL, result.model_dump_json())
+    except Exception as e:
+        logger.warning("Failed to cache profile synthesis: %s", e)
+
+
+# Provider-side limits are per minute, so every LLM request from this process (primary or
+# backup, sync or async) takes a slot from one shared bucket before it goes out
+_llm_rate_limiter = RequestRateLimiter(
+    rate_per_minute=float(os.getenv("PROFILE_SYNTHESIS_RPM", "60")),
+    burst=int(os.getenv("PROFILE_SYNTHESIS_RPM_BURST", "5")),
+)
+# Cap on syntheses in flight per event loop for aget_llm_profile_synthesis; semaphores are
+# bound to a loop, so one is kept per loop
+MAX_CONCURRENCY = int(os.getenv("PROFILE_SYNTHESIS_MAX_CONCURRENCY", "8"))
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _semaphores_lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = _semaphores[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+        return semaphore
+
+
+# Attempts for the primary model, with full-jitter exponential backoff between them so
+# workers that hit a rate limit together don't retry in lockstep. The backup OpenAI client
+# keeps the SDK's own retries (already jittered and Retry-After aware), so it is tried once.
+MAX_ATTEMPTS = max(1, int(os.getenv("PROFILE_SYNTHESIS_MAX_ATTEMPTS", "3")))
+BACKOFF_BASE_SECONDS = float(os.getenv("PROFILE_SYNTHESIS_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("PROFILE_SYNTHESIS_BACKOFF_MAX_SECONDS", "60"))
+
+_RETRYABLE_ERRORS: tuple[type[BaseException], ...] = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+if google_exceptions is not None:
+    _RETRYABLE_ERRORS += (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+    )
+
+
+def _backoff_delay(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _invoke(chain, payload: dict, attempts: int = 1) -> LLMAnalysisResult:
+    for attempt in range(attempts):
+        time.sleep(_llm_rate_limiter.reserve())
+        try:
+            return chain.invoke(payload)
+        except _RETRYABLE_ERRORS as e:
+            if attempt + 1 >= attempts:
+                raise
+            delay = _backoff_delay(attempt)
+            logger.warning("Profile synthesis attempt %d failed (%s), retrying in %.1fs", attempt + 1, e, delay)
+            time.sleep(delay)
+
+
+async def _ainvoke(chain, payload: dict, attempts: int = 1) -> LLMAnalysisResult:
+    async with _get_semaphore():
+        for attempt in range(attempts):
+            await asyncio.sleep(_llm_rate_limiter.reserve())
+            try:
+                return await chain.ainvoke(payload)
+            except _RETRYABLE_ERRORS as e:
+                if attempt + 1 >= attempts:
+                    raise
+                delay = _backoff_delay(attempt)
+                logger.warning("Profile synthesis attempt %d failed (%s), retrying in %.1fs", attempt + 1, e, delay)
+                await asyncio.sleep(delay)
+
+
+def _build_payload(user_messages_str: str, existing_metadata_json_str: str, existing_summary_text: str) -> dict:
+    truncated_messages_str = _truncate_messages(user_messages_str, MAX_INPUT_CHARS)
+    if len(truncated_messages_str) != len(user_messages_str):
+        logger.info(
+            "Truncated user messages for profile synthesis from %d to %d characters",
+            len(user_messages_str), len(truncated_messages_str)
+        )
+    return {
+        "existing_metadata_json": existing_metadata_json_str,
+        "existing_summary_text": existing_summary_text,
+        "user_messages_chronological": truncated_messages_str
+    }
+
+
+# Once the primary model keeps failing, stop paying its timeouts and retries on every
+# synthesis: while the circuit is open, requests go straight to the OpenAI backup
+_primary_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("PROFILE_SYNTHESIS_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("PROFILE_SYNTHESIS_BREAKER_RESET_SECONDS", "30")),
+)
+
+
+def _has_backup() -> bool:
+    # No backup if we're already using OpenAI or if OpenAI is not available
+    return not _using_openai() and bool(os.getenv("OPENAI_API_KEY"))
+
+
+def _use_primary() -> bool:
+    """Whether to call the primary model; False while its circuit is open and a backup exists."""
+    if not _has_backup() or _primary_breaker.allow_request():
+        return True
+    logger.warning("Primary model circuit is open; using OpenAI backup directly")
+    return False
+
+
+def _can_fall_back(e: Exception) -> bool:
+    """Whether a primary-model failure can be retried on OpenAI; logs the outcome either way."""
+    if not _has_backup():
+        logger.error(f"Profile synthesis failed: {e}")
+        return False
+    logger.warning(f"Primary model failed: {e}. Attempting with OpenAI backup.")
+    return True
+
+
+@lru_cache(maxsize=1)
+def _get_backup_chain() -> Runnable:
+    """The OpenAI backup chain, built on the first fallback and reused for every later one."""
+    backup_llm = ChatOpenAI(
+        temperature=0,
+        model=_OPENAI_MODEL,
+        timeout=120,
+        max_retries=2
+    )
+    return _prompt_template | backup_llm.with_structured_output(LLMAnalysisResult)
+
 
 def get_llm_profile_synthesis(
     user_messages_str: str,
     existing_metadata_json_str: str,
     existing_summary_text: str
-) -> str:
+) -> LLMAnalysisResult:
     """
     Invokes an LLM chain to synthesize a user profile based on messages and existing data.
 
+    Results are cached in Redis by a hash of the prompt and inputs, so repeating a
+    synthesis with unchanged inputs skips the LLM. Blocks for the whole LLM call; use
+    aget_llm_profile_synthesis from async code.
+
     Args:
         user_messages_str: A string containing formatted user messages
         existing_metadata_json_str: A JSON string of the user's existing metadata profile.
         existing_summary_text: A string of the user's existing context summary.
 
     Returns:
-        The raw string response from the LLM.
+        The structured LLMAnalysisResult from the LLM.
     """
-    
+    payload = _build_payload(user_messages_str, existing_metadata_json_str, existing_summary_text)
+    cache_key = _synthesis_cache_key(payload)
+    cached = _get_cached_synthesis(cache_key)
+    if cached is not None:
+        logger.info("Using cached profile synthesis")
+        return cached
+
+    if _use_primary():
+        try:
+            response_content = _invoke(_get_primary()[0], payload, attempts=MAX_ATTEMPTS)
+        except Exception as e:
+            _primary_breaker.record_failure()
+            if not _can_fall_back(e):
+                raise
+        else:
+            _primary_breaker.record_success()
+            _cache_synthesis(cache_key, response_content)
+            return response_content
+
     try:
-        response_content = _profile_synthesis_chain.invoke({
-            "existing_metadata_json": existing_metadata_json_str,
-            "existing_summary_text": existing_summary_text,
-            "user_messages_chronological": user_messages_str
-        })
+        response_content = _invoke(_get_backup_chain(), payload)
+        logger.info("Successfully used OpenAI backup for profile synthesis")
+        _cache_synthesis(cache_key, response_content)
         return response_content
-    except Exception as e:
-        # If we're already using OpenAI or if OpenAI is not available, re-raise the error
-        if _using_openai or not os.getenv("OPENAI_API_KEY"):
-            logger.error(f"Profile synthesis failed: {e}")
-            raise
-        
-        # Try with OpenAI as backup
-        logger.warning(f"Primary model failed: {e}. Attempting with OpenAI backup.")
-        
-        backup_llm = ChatOpenAI(
-            temperature=0,
-            model=os.getenv("OPENAI_MODEL", "gpt-5-mini"),
-            timeout=120,
-            max_retries=2
-        )
-        backup_chain = _prompt_template | backup_llm.with_structured_output(LLMAnalysisResult)
-        
+    except Exception as backup_error:
+        logger.error(f"Both primary and backup models failed: {backup_error}")
+        raise
+
+
+async def aget_llm_profile_synthesis(
+    user_messages_str: str,
+    existing_metadata_json_str: str,
+    existing_summary_text: str
+) -> LLMAnalysisResult:
+    """
+    Async counterpart of get_llm_profile_synthesis, with the same caching and OpenAI fallback.
+
+    The chains run through ainvoke, so the event loop keeps serving other work during the
+    LLM call; the synchronous Redis cache accesses run in a worker thread.
+    """
+    payload = _build_payload(user_messages_str, existing_metadata_json_str, existing_summary_text)
+    cache_key = _synthesis_cache_key(payload)
+    cached = await asyncio.to_thread(_get_cached_synthesis, cache_key)
+    if cached is not None:
+        logger.info("Using cached profile synthesis")
+        return cached
+
+    if _use_primary():
         try:
-            response_content = backup_chain.invoke({
-                "existing_metadata_json": existing_metadata_json_str,
-                "existing_summary_text": existing_summary_text,
-                "user_messages_chronological": user_messages_str
-            })
-            logger.info("Successfully used OpenAI backup for profile synthesis")
+            response_content = await _ainvoke(_get_primary()[0], payload, attempts=MAX_ATTEMPTS)
+        except Exception as e:
+            _primary_breaker.record_failure()
+            if not _can_fall_back(e):
+                raise
+        else:
+            _primary_breaker.record_success()
+            await asyncio.to_thread(_cache_synthesis, cache_key, response_content)
             return response_content
-        except Exception as backup_error:
-            logger.error(f"Both primary and backup models failed: {backup_error}")
-            raise
 
+    try:
+        response_content = await _ainvoke(_get_backup_chain(), payload)
+        logger.info("Successfully used OpenAI backup for profile synthesis")
+        await asyncio.to_thread(_cache_synthesis, cache_key, response_content)
+        return response_content
+    except Exception as backup_error:
+        logger.error(f"Both primary and backup models failed: {backup_error}")
+        raise
 
 
 if __name__ == "__main__":
@@ -115,11 +416,11 @@ if __name__ == "__main__":
     mock_existing_summary = "User previously expressed interest in photography."
 
     print(f"Synthesizing profile for user based on new messages...")
-    raw_llm_response = get_llm_profile_synthesis(
+    raw_llm_response = asyncio.run(aget_llm_profile_synthesis(
         user_messages_str=mock_user_messages,
         existing_metadata_json_str=mock_existing_metadata,
         existing_summary_text=mock_existing_summary
-    )
+    ))
 
     print("\n--- Raw LLM Response ---")
     print(raw_llm_response.user_profile_summary)
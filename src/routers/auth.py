@@ -15,6 +15,7 @@ from src.exceptions import (
     DuplicateRecordError, RecordNotFoundError
 )
 from src.exceptions.handlers import ExceptionHandler
+from src.utils.jwt_cache import verify_token
 from src.utils.user_cache import invalidate_user_cache
 
 router = APIRouter()
@@ -24,8 +25,9 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 api_key_scheme = HTTPBearer()
 
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> DBUser:
-    token_data = security.decode_token(token)
-    if token_data is None or token_data.sub is None:
+    # Reuse a recent verification of the same token (shared with the MCP auth middleware)
+    token_data, _ = verify_token(token)
+    if token_data is None:
         raise InvalidCredentialsError(message="Could not validate credentials")
     
     user = await crud_user.get_user_by_username(db, username=token_data.sub)
@@ -13,7 +13,6 @@ from src.crud import crud_memory
 from src.crud.crud_processed_user_profile import get_processed_user_profile
 from src.memory_manager import MemoryManager
 from src.services.graph_service import GraphService
-from src.core.context import set_current_user_id
 
 router = APIRouter()
 
@@ -97,11 +96,8 @@ async def search_memories(
     """
     Perform semantic search across user's memories using Qdrant.
     """
-    # Set user context for memory manager
-    set_current_user_id(current_user.id)
-    
     # Perform semantic search using Qdrant
-    qdrant_results = await memory_manager.search_related(query)
+    qdrant_results = await memory_manager.search_related(query, user_id=current_user.id)
     
     # Enhance results with full memory details from PostgreSQL
     enhanced_results = []
@@ -164,9 +160,6 @@ async def delete_all_memories(
     This permanently removes all memories from both PostgreSQL and Qdrant,
     as well as the user's processed profile data. This action cannot be undone.
     """
-    # Set user context for memory manager
-    set_current_user_id(current_user.id)
-    
     # Use memory manager to delete all user data
     result_message = await memory_manager.delete_all_user_memories(db=db, user_id=current_user.id)
     
@@ -211,9 +204,6 @@ async def create_memory(
     This stores the memory in both PostgreSQL and Qdrant for optimal 
     retrieval and semantic search capabilities.
     """
-    # Set user context for memory manager
-    set_current_user_id(current_user.id)
-    
     # Use memory manager to store in both databases
     result_message = await memory_manager.store(
         content=memory_in.content,
@@ -250,9 +240,6 @@ async def create_bulk_memories(
     
     Maximum of 100 memories can be created per request.
     """
-    # Set user context for memory manager
-    set_current_user_id(current_user.id)
-    
     results = []
     total_created = 0
     total_failed = 0
@@ -322,9 +309,6 @@ async def update_memory(
     
     This updates the memory in both PostgreSQL and Qdrant.
     """
-    # Set user context for memory manager
-    set_current_user_id(current_user.id)
-    
     # Use memory manager to update in both databases
     result_message = await memory_manager.update_memory(
         memory_id=str(memory_id),
@@ -357,9 +341,6 @@ async def delete_memory(
     
     This deletes the memory from both PostgreSQL and Qdrant.
     """
-    # Set user context for memory manager
-    set_current_user_id(current_user.id)
-    
     # Use memory manager to delete from both databases
     result_message = await memory_manager.delete_memory(
         memory_id=str(memory_id),
@@ -3,7 +3,8 @@ import json
 import logging
 from datetime import datetime, timezone
 from typing import List, Dict, Any
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from celery.exceptions import SoftTimeLimitExceeded
 from celery_singleton import Singleton
 from src.celery_app import celery_app
@@ -83,16 +84,16 @@ def update_profile_background(
                     # If conversion fails, use as-is (might be UUIDs)
                     message_ids_int = message_ids
                 
-                # Use SELECT FOR UPDATE to lock rows during check
-                check_stmt = select(UserMessage).where(
-                    UserMessage.id.in_(message_ids_int)
+                # Use SELECT FOR UPDATE to lock rows during check. Only the IDs of rows still
+                # unprocessed are needed, so filter and project in SQL and fetch them as one
+                # batch instead of hydrating every UserMessage (and its content) in Python
+                check_stmt = select(UserMessage.id).where(
+                    UserMessage.id.in_(message_ids_int),
+                    UserMessage.is_processed.is_(False),
                 ).with_for_update(skip_locked=True)  # Skip rows locked by other transactions
                 
-                locked_messages = []
-                for msg in db.execute(check_stmt).scalars():
-                    if not msg.is_processed:
-                        messages_to_process.append(msg.id)  # Store actual ID type from DB
-                        locked_messages.append(msg)
+                # Store actual ID type from DB
+                messages_to_process = list(db.execute(check_stmt).scalars())
                 
                 if not messages_to_process:
                     logger.info(f"All messages already processed or locked by other workers for user {user_id}, exiting task")
@@ -113,18 +114,13 @@ def update_profile_background(
             # Use the actual DB IDs we locked, not the string IDs from input
             message_ids_to_mark = messages_to_process if messages_to_process else []
             
-            for idx, msg_data in enumerate(unprocessed_messages):
+            # No progress updates in here: formatting takes microseconds per message, while
+            # each update_state is a result-backend round-trip that delays the LLM call
+            for msg_data in unprocessed_messages:
                 timestamp = msg_data.get("created_at", datetime.now(timezone.utc).isoformat())
                 content = msg_data.get("message_content", "")
                 
                 user_messages_parts.append(f"Timestamp: {timestamp}\nUser: {content}")
-                
-                # Update progress every 5 messages
-                if idx % 5 == 0:
-                    self.update_state(
-                        state='PROGRESS',
-                        meta={'current': idx, 'total': len(unprocessed_messages), 'status': 'Processing messages'}
-                    )
             
             user_messages_str = "\n\n".join(user_messages_parts)
             
@@ -153,21 +149,20 @@ def update_profile_background(
                 )
 
             new_summary = None
-            new_metadata_json_str = None
+            new_metadata = None
 
             try:
                 new_summary = llm_response.user_profile_summary.strip()
                 raw_metadata_str = llm_response.user_profile_metadata.strip()
                 
-                # Validate JSON format
-                json.loads(raw_metadata_str)
-                new_metadata_json_str = raw_metadata_str
+                # Parse once; the JSONB column takes the parsed value directly
+                new_metadata = json.loads(raw_metadata_str)
                 
                 logger.debug(f"Successfully parsed LLM response for user {user_id}")
                 
             except json.JSONDecodeError as e:
                 logger.error(f"Invalid JSON metadata from LLM for user {user_id}: {raw_metadata_str[:100]}...", exc_info=True)
-                new_metadata_json_str = "{}"  # Fallback to empty JSON
+                new_metadata = {}  # Fallback to empty JSON
                 
             except AttributeError as e:
                 logger.error(f"Missing attributes in LLM response for user {user_id}: {e}", exc_info=True)
@@ -178,30 +173,27 @@ def update_profile_background(
                     original_exception=e
                 )
 
-            if new_summary is not None and new_metadata_json_str is not None:
+            if new_summary is not None and new_metadata is not None:
                 logger.debug(f"Updating database profile for user {user_id}")
                 
-                # Find existing profile or create new one
-                stmt = select(ProcessedUserProfile).where(ProcessedUserProfile.user_id == user_id)
-                profile = db.execute(stmt).scalars().first()
-                
-                if profile:
-                    logger.debug(f"Updating existing profile for user {user_id}")
-                    profile.summary_text = new_summary
-                    profile.metadata_json = new_metadata_json_str
-                    db.add(profile)
-                else:
-                    logger.debug(f"Creating new profile for user {user_id}")
-                    profile = ProcessedUserProfile(
-                        user_id=user_id,
-                        summary_text=new_summary,
-                        metadata_json=new_metadata_json_str,
-                    )
-                    db.add(profile)
+                # Create or update the profile in a single round-trip (user_id is unique)
+                upsert_stmt = pg_insert(ProcessedUserProfile).values(
+                    user_id=user_id,
+                    summary_text=new_summary,
+                    metadata_json=new_metadata,
+                )
+                upsert_stmt = upsert_stmt.on_conflict_do_update(
+                    index_elements=[ProcessedUserProfile.user_id],
+                    set_={
+                        "summary_text": upsert_stmt.excluded.summary_text,
+                        "metadata_json": upsert_stmt.excluded.metadata_json,
+                        "updated_at": func.now(),
+                    },
+                )
                 
                 try:
                     # Don't commit yet - we need to mark messages as processed first
-                    db.flush()  # Flush profile changes but keep transaction open
+                    db.execute(upsert_stmt)
                     logger.info(f"Profile updated for user {user_id}, marking messages as processed...")
                     
                     # Mark messages as processed in the same transaction
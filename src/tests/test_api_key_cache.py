@@ -0,0 +1,109 @@
+"""
+Test the in-process API key cache used by the auth middlewares.
+"""
+import uuid
+from unittest.mock import Mock, patch
+from src.utils.api_key_cache import ApiKeyCache, CachedUser
+
+
+class FakeClock:
+    """Stands in for time.monotonic so entries can be aged past their TTL."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def make_user(username: str = "alice", is_active: bool = True) -> Mock:
+    user = Mock()
+    user.id = uuid.uuid4()
+    user.username = username
+    user.email = f"{username}@example.com"
+    user.is_active = is_active
+    user.is_superuser = False
+    user.api_key_created_at = None
+    return user
+
+
+def test_api_key_cache_hit_returns_snapshot():
+    """Test that a cached key returns a detached CachedUser."""
+    cache = ApiKeyCache(ttl_seconds=60, negative_ttl_seconds=10)
+    user = make_user()
+
+    assert cache.lookup("sk_alice") == (False, None)
+    snapshot = cache.put("sk_alice", user)
+
+    hit, cached = cache.lookup("sk_alice")
+    assert hit
+    assert isinstance(cached, CachedUser)
+    assert cached == snapshot
+    assert cached.id == user.id and cached.username == "alice"
+    print("✓ API key cache returns the cached user snapshot")
+
+
+def test_api_key_cache_negative_entry_uses_short_ttl():
+    """Test that unknown keys are cached as None for the negative TTL only."""
+    clock = FakeClock()
+    with patch("src.utils.api_key_cache.time", clock):
+        cache = ApiKeyCache(ttl_seconds=60, negative_ttl_seconds=10)
+        assert cache.put("sk_unknown", None) is None
+
+        assert cache.lookup("sk_unknown") == (True, None)
+        clock.now += 10
+        assert cache.lookup("sk_unknown") == (False, None)
+    print("✓ Unknown keys expire after the negative TTL")
+
+
+def test_api_key_cache_positive_entry_expires():
+    """Test that known keys expire after the positive TTL."""
+    clock = FakeClock()
+    with patch("src.utils.api_key_cache.time", clock):
+        cache = ApiKeyCache(ttl_seconds=60, negative_ttl_seconds=10)
+        cache.put("sk_alice", make_user())
+
+        clock.now += 59
+        assert cache.lookup("sk_alice")[0]
+        clock.now += 1
+        assert cache.lookup("sk_alice") == (False, None)
+    print("✓ Known keys expire after the TTL")
+
+
+def test_api_key_cache_evicts_least_recently_used():
+    """Test that the cache is bounded and evicts the least recently used key."""
+    cache = ApiKeyCache(max_size=2)
+    cache.put("sk_a", make_user("a"))
+    cache.put("sk_b", make_user("b"))
+    cache.lookup("sk_a")
+    cache.put("sk_c", make_user("c"))
+
+    assert cache.lookup("sk_a")[0]
+    assert not cache.lookup("sk_b")[0]
+    assert cache.lookup("sk_c")[0]
+    print("✓ API key cache evicts the least recently used key")
+
+
+def test_api_key_cache_invalidate_and_digest_keys():
+    """Test invalidation, and that raw keys are never stored."""
+    cache = ApiKeyCache()
+    cache.put("sk_alice", make_user())
+
+    assert "sk_alice" not in cache._entries
+    assert all(len(key) == 16 for key in cache._entries)
+
+    cache.invalidate("sk_alice")
+    assert cache.lookup("sk_alice") == (False, None)
+    print("✓ API key cache invalidates and stores digests only")
+
+
+if __name__ == "__main__":
+    print("Testing ApiKeyCache...")
+
+    test_api_key_cache_hit_returns_snapshot()
+    test_api_key_cache_negative_entry_uses_short_ttl()
+    test_api_key_cache_positive_entry_expires()
+    test_api_key_cache_evicts_least_recently_used()
+    test_api_key_cache_invalidate_and_digest_keys()
+
+    print("\n✅ All API key cache tests passed!")
@@ -0,0 +1,128 @@
+"""
+Test the closed / open / half-open transitions of CircuitBreaker.
+"""
+from unittest.mock import patch
+from src.utils.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    """Stands in for time.monotonic so the reset timeout can be stepped over."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_opens_after_threshold_failures():
+    """Test that the circuit stays closed below the threshold and opens at it."""
+    clock = FakeClock()
+    with patch("src.utils.circuit_breaker.time", clock):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30.0)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+    print("✓ Circuit opens after the failure threshold")
+
+
+def test_success_resets_failure_count():
+    """Test that a success in between failures starts the count over."""
+    clock = FakeClock()
+    with patch("src.utils.circuit_breaker.time", clock):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+    print("✓ Success resets the consecutive failure count")
+
+
+def test_half_open_lets_one_probe_through():
+    """Test that after the reset timeout exactly one probe request is allowed."""
+    clock = FakeClock()
+    with patch("src.utils.circuit_breaker.time", clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+        breaker.record_failure()
+
+        clock.now += 29.9
+        assert not breaker.allow_request()
+
+        clock.now += 0.1
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        # The probe is in flight; nothing else gets through
+        assert not breaker.allow_request()
+    print("✓ Half-open state allows a single probe")
+
+
+def test_half_open_probe_success_closes():
+    """Test that a successful probe closes the circuit."""
+    clock = FakeClock()
+    with patch("src.utils.circuit_breaker.time", clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+        breaker.record_failure()
+        clock.now += 30.0
+        assert breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow_request()
+    print("✓ Successful probe closes the circuit")
+
+
+def test_half_open_probe_failure_reopens():
+    """Test that a failed probe re-opens the circuit even below the threshold."""
+    clock = FakeClock()
+    with patch("src.utils.circuit_breaker.time", clock):
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30.0)
+        for _ in range(5):
+            breaker.record_failure()
+        clock.now += 30.0
+        assert breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+        # The reset timeout starts over from the failed probe
+        clock.now += 30.0
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+    print("✓ Failed probe re-opens the circuit")
+
+
+def test_silent_probe_is_replaced():
+    """Test that a probe which never reports back is replaced after another reset timeout."""
+    clock = FakeClock()
+    with patch("src.utils.circuit_breaker.time", clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30.0)
+        breaker.record_failure()
+        clock.now += 30.0
+        assert breaker.allow_request()
+
+        clock.now += 10.0
+        assert not breaker.allow_request()
+        clock.now += 20.0
+        assert breaker.allow_request()
+    print("✓ Silent probe is replaced after the reset timeout")
+
+
+if __name__ == "__main__":
+    print("Testing CircuitBreaker...")
+
+    test_opens_after_threshold_failures()
+    test_success_resets_failure_count()
+    test_half_open_lets_one_probe_through()
+    test_half_open_probe_success_closes()
+    test_half_open_probe_failure_reopens()
+    test_silent_probe_is_replaced()
+
+    print("\n✅ All circuit breaker tests passed!")
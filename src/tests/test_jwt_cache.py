@@ -0,0 +1,155 @@
+"""
+Test the in-process cache of verified internal JWTs.
+"""
+import os
+import uuid
+from unittest.mock import Mock, patch
+
+# src.core.security (imported by the JWT cache) refuses to load without these
+os.environ.setdefault("AUTH_SECRET_KEY", "test-secret-key")
+os.environ.setdefault("AUTH_ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+from src.schemas.token import TokenPayload
+from src.utils.api_key_cache import CachedUser
+from src.utils import jwt_cache as jwt_cache_module
+from src.utils.jwt_cache import JWTCache
+
+
+class FakeClock:
+    """Stands in for the time module: monotonic() drives TTLs, time() is wall clock for exp."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+def make_user(username: str = "alice", is_active: bool = True) -> Mock:
+    user = Mock()
+    user.id = uuid.uuid4()
+    user.username = username
+    user.email = f"{username}@example.com"
+    user.is_active = is_active
+    user.is_superuser = False
+    user.api_key_created_at = None
+    return user
+
+
+def test_jwt_cache_negative_entry_uses_short_ttl():
+    """Test that tokens which failed verification are cached for the negative TTL."""
+    clock = FakeClock()
+    with patch("src.utils.jwt_cache.time", clock):
+        cache = JWTCache(ttl_seconds=60, negative_ttl_seconds=30)
+        cache.put("bad.token.value", None)
+
+        assert cache.get("bad.token.value") == (None, None)
+        clock.now += 30
+        assert cache.get("bad.token.value") is None
+    print("✓ Invalid tokens expire after the negative TTL")
+
+
+def test_jwt_cache_clamps_to_token_exp():
+    """Test that an entry never outlives the token's own exp."""
+    clock = FakeClock()
+    with patch("src.utils.jwt_cache.time", clock):
+        cache = JWTCache(ttl_seconds=60)
+        payload = TokenPayload(sub="alice", exp=int(clock.now) + 5)
+        cache.put("a.b.c", payload)
+
+        assert cache.get("a.b.c") == (payload, None)
+        clock.now += 5
+        assert cache.get("a.b.c") is None
+    print("✓ JWT cache entries are clamped to the token exp")
+
+
+def test_jwt_cache_skips_expired_token():
+    """Test that an already expired token is not cached at all."""
+    clock = FakeClock()
+    with patch("src.utils.jwt_cache.time", clock):
+        cache = JWTCache(ttl_seconds=60)
+        cache.put("a.b.c", TokenPayload(sub="alice", exp=int(clock.now) - 1))
+
+        assert cache.get("a.b.c") is None
+        assert not cache._entries
+    print("✓ Expired tokens are not cached")
+
+
+def test_jwt_cache_set_user():
+    """Test that the resolved user is attached to a cached token only."""
+    cache = JWTCache()
+    payload = TokenPayload(sub="alice")
+    user = CachedUser.from_user(make_user())
+
+    cache.set_user("missing.token.value", user)
+    assert cache.get("missing.token.value") is None
+
+    cache.put("a.b.c", payload)
+    cache.set_user("a.b.c", user)
+    assert cache.get("a.b.c") == (payload, user)
+    print("✓ JWT cache attaches the resolved user")
+
+
+def test_jwt_cache_invalidate_subject():
+    """Test that invalidate_subject drops every token of that user and nothing else."""
+    cache = JWTCache()
+    cache.put("alice.token.one", TokenPayload(sub="alice"))
+    cache.put("alice.token.two", TokenPayload(sub="alice"))
+    cache.put("bob.token.one", TokenPayload(sub="bob"))
+    cache.put("bad.token.value", None)
+
+    cache.invalidate_subject("alice")
+
+    assert cache.get("alice.token.one") is None
+    assert cache.get("alice.token.two") is None
+    assert cache.get("bob.token.one") is not None
+    assert cache.get("bad.token.value") == (None, None)
+
+    # No subject is a no-op
+    cache.invalidate_subject(None)
+    assert cache.get("bob.token.one") is not None
+    print("✓ invalidate_subject drops only that user's tokens")
+
+
+def test_verify_token_decodes_once():
+    """Test that verify_token caches both valid and invalid outcomes."""
+    cache = JWTCache()
+    payload = TokenPayload(sub="alice")
+    with patch.object(jwt_cache_module, "jwt_cache", cache), \
+         patch.object(jwt_cache_module.security, "decode_token", return_value=payload) as decode:
+        assert jwt_cache_module.verify_token("a.b.c") == (payload, None)
+        assert jwt_cache_module.verify_token("a.b.c") == (payload, None)
+        assert decode.call_count == 1
+
+    with patch.object(jwt_cache_module, "jwt_cache", cache), \
+         patch.object(jwt_cache_module.security, "decode_token", return_value=None) as decode:
+        assert jwt_cache_module.verify_token("x.y.z") == (None, None)
+        assert jwt_cache_module.verify_token("x.y.z") == (None, None)
+        assert decode.call_count == 1
+    print("✓ verify_token decodes each token once")
+
+
+def test_verify_token_rejects_missing_subject():
+    """Test that a token without a subject is treated as invalid."""
+    cache = JWTCache()
+    with patch.object(jwt_cache_module, "jwt_cache", cache), \
+         patch.object(jwt_cache_module.security, "decode_token", return_value=TokenPayload()):
+        assert jwt_cache_module.verify_token("a.b.c") == (None, None)
+    print("✓ Tokens without a subject are rejected")
+
+
+if __name__ == "__main__":
+    print("Testing JWTCache...")
+
+    test_jwt_cache_negative_entry_uses_short_ttl()
+    test_jwt_cache_clamps_to_token_exp()
+    test_jwt_cache_skips_expired_token()
+    test_jwt_cache_set_user()
+    test_jwt_cache_invalidate_subject()
+    test_verify_token_decodes_once()
+    test_verify_token_rejects_missing_subject()
+
+    print("\n✅ All JWT cache tests passed!")
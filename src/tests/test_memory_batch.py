@@ -0,0 +1,79 @@
+"""
+Test validation of store_batch input in the memory manager.
+"""
+from src.memory_manager import _normalize_batch, MAX_MEMORY_CONTENT_LENGTH
+
+
+def test_valid_entries_pass_through():
+    """Test that valid entries come back as (content, tags) pairs, in order."""
+    valid, errors = _normalize_batch([
+        {"content": "likes tea", "tags": ["food"]},
+        {"content": "lives in Izmir"},
+        {"content": "works remotely", "tags": None},
+    ])
+
+    assert errors == []
+    assert valid == [
+        ("likes tea", ["food"]),
+        ("lives in Izmir", []),
+        ("works remotely", []),
+    ]
+    print("✓ Valid entries pass through with default tags")
+
+
+def test_content_is_not_modified():
+    """Test that content is stored exactly as given, like store() does."""
+    valid, errors = _normalize_batch([{"content": "  indented\n"}])
+
+    assert errors == []
+    assert valid == [("  indented\n", [])]
+    print("✓ Content is left unstripped")
+
+
+def test_invalid_entries_are_reported_per_item():
+    """Test that each bad entry is reported with its index and the rest are kept."""
+    valid, errors = _normalize_batch([
+        "not a dict",
+        {"tags": ["x"]},
+        {"content": 42},
+        {"content": "   "},
+        {"content": "nul\x00byte"},
+        {"content": "x" * (MAX_MEMORY_CONTENT_LENGTH + 1)},
+        {"content": "bad tags", "tags": "food"},
+        {"content": "bad tag type", "tags": ["ok", 1]},
+        {"content": "fine"},
+    ])
+
+    assert valid == [("fine", [])]
+    assert errors == [
+        (0, "entry must be an object with a 'content' key"),
+        (1, "content must be a string"),
+        (2, "content must be a string"),
+        (3, "content is empty"),
+        (4, "content contains a NUL character"),
+        (5, f"content exceeds {MAX_MEMORY_CONTENT_LENGTH} characters"),
+        (6, "tags must be a list of strings"),
+        (7, "tags must be a list of strings"),
+    ]
+    print("✓ Invalid entries are reported individually")
+
+
+def test_content_at_length_limit_is_accepted():
+    """Test that content of exactly the maximum length is accepted."""
+    content = "x" * MAX_MEMORY_CONTENT_LENGTH
+    valid, errors = _normalize_batch([{"content": content}])
+
+    assert errors == []
+    assert valid == [(content, [])]
+    print("✓ Content at the length limit is accepted")
+
+
+if __name__ == "__main__":
+    print("Testing store_batch validation...")
+
+    test_valid_entries_pass_through()
+    test_content_is_not_modified()
+    test_invalid_entries_are_reported_per_item()
+    test_content_at_length_limit_is_accepted()
+
+    print("\n✅ All batch validation tests passed!")
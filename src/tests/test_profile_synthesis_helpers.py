@@ -0,0 +1,94 @@
+"""
+Test the prompt splitting and message truncation helpers of profile synthesis.
+"""
+from src.nlp.prompts import get_user_profile_synthesizer_prompt
+from src.nlp.synthesize_user_profile import (
+    _PROMPT_FIELDS,
+    _TRUNCATION_NOTE,
+    _format_prompt,
+    _split_prompt,
+    _truncate_messages,
+)
+
+
+def make_messages(count: int) -> str:
+    """Build a message log the way update_profile_background joins it."""
+    return "\n\n".join(
+        f"Timestamp: 2025-01-0{i + 1}T00:00:00\nUser: message {i}" for i in range(count)
+    )
+
+
+def test_split_prompt_around_fields():
+    """Test that the template is split around each field, in order."""
+    parts = _split_prompt("A {x} B {y} C", ("x", "y"))
+
+    assert parts == ("A ", " B ", " C")
+    print("✓ Template is split around its fields")
+
+
+def test_split_prompt_unescapes_braces():
+    """Test that doubled braces in the static text come back as literal braces."""
+    parts = _split_prompt('{{"key": "{x}"}}', ("x",))
+
+    assert parts == ('{"key": "', '"}')
+    print("✓ Escaped braces are unescaped")
+
+
+def test_split_prompt_matches_str_format():
+    """Test that joining the real prompt's parts gives the same text as str.format."""
+    template = get_user_profile_synthesizer_prompt()
+    values = {
+        "user_messages_chronological": "Timestamp: now\nUser: hi {not a field}",
+        "existing_metadata_json": '{"name": "Ada"}',
+        "existing_summary_text": "Likes {braces}",
+    }
+
+    assert _format_prompt(values) == template.format(**values)
+    assert len(_split_prompt(template, _PROMPT_FIELDS)) == len(_PROMPT_FIELDS) + 1
+    print("✓ Split prompt formats identically to str.format")
+
+
+def test_truncate_messages_keeps_short_input():
+    """Test that input within the limit, or with the limit disabled, is returned unchanged."""
+    messages = make_messages(3)
+
+    assert _truncate_messages(messages, len(messages)) is messages
+    assert _truncate_messages(messages, 0) is messages
+    assert _truncate_messages(messages, -1) is messages
+    print("✓ Short input and a disabled limit leave messages unchanged")
+
+
+def test_truncate_messages_cuts_on_message_boundary():
+    """Test that truncation keeps the newest whole messages and marks the omission."""
+    messages = make_messages(5)
+    last_two = "\n\n".join(messages.split("\n\n")[-2:])
+    max_chars = len(last_two) + 5
+
+    truncated = _truncate_messages(messages, max_chars)
+
+    assert truncated == _TRUNCATION_NOTE + last_two
+    assert truncated[len(_TRUNCATION_NOTE):].startswith("Timestamp: ")
+    print("✓ Truncation keeps the newest whole messages")
+
+
+def test_truncate_messages_without_boundary_keeps_tail():
+    """Test that input with no message boundary after the cut keeps the last max_chars characters."""
+    messages = "x" * 50 + "y" * 50
+
+    truncated = _truncate_messages(messages, 30)
+
+    assert truncated == _TRUNCATION_NOTE + "y" * 30
+    print("✓ Truncation falls back to a plain tail cut")
+
+
+if __name__ == "__main__":
+    print("Testing profile synthesis helpers...")
+
+    test_split_prompt_around_fields()
+    test_split_prompt_unescapes_braces()
+    test_split_prompt_matches_str_format()
+    test_truncate_messages_keeps_short_input()
+    test_truncate_messages_cuts_on_message_boundary()
+    test_truncate_messages_without_boundary_keeps_tail()
+
+    print("\n✅ All profile synthesis helper tests passed!")
@@ -0,0 +1,167 @@
+"""
+Test the per-user semantic query cache in front of the Qdrant search.
+"""
+import math
+import uuid
+from unittest.mock import patch
+from src.utils.semantic_cache import SemanticQueryCache
+
+
+class FakeClock:
+    """Stands in for time.monotonic so entries can be aged past the TTL."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def rotated(angle_degrees: float) -> list[float]:
+    """A unit vector whose cosine similarity with [1, 0] is cos(angle)."""
+    angle = math.radians(angle_degrees)
+    return [math.cos(angle), math.sin(angle)]
+
+
+RESULTS = [{"id": str(i), "content": f"memory {i}"} for i in range(10)]
+
+
+def test_near_duplicate_query_hits():
+    """Test that a query at or above the similarity threshold is served from the cache."""
+    cache = SemanticQueryCache(threshold=0.95)
+    user_id = uuid.uuid4()
+    cache.put(user_id, [1.0, 0.0], 10, RESULTS, cache.generation(user_id))
+
+    # cos(10°) ≈ 0.985; the magnitude of the query vector doesn't matter
+    assert cache.get(user_id, [2.0, 0.0], 10) == RESULTS
+    assert cache.get(user_id, rotated(10), 10) == RESULTS
+    print("✓ Near-duplicate queries hit the cache")
+
+
+def test_query_below_threshold_misses():
+    """Test that a query below the similarity threshold is a miss."""
+    cache = SemanticQueryCache(threshold=0.95)
+    user_id = uuid.uuid4()
+    cache.put(user_id, [1.0, 0.0], 10, RESULTS, cache.generation(user_id))
+
+    # cos(20°) ≈ 0.94
+    assert cache.get(user_id, rotated(20), 10) is None
+    print("✓ Queries below the threshold miss")
+
+
+def test_limit_check():
+    """Test that an entry only answers queries asking for at most as many results."""
+    cache = SemanticQueryCache()
+    user_id = uuid.uuid4()
+    cache.put(user_id, [1.0, 0.0], 10, RESULTS, cache.generation(user_id))
+
+    assert cache.get(user_id, [1.0, 0.0], 5) == RESULTS[:5]
+    assert cache.get(user_id, [1.0, 0.0], 10) == RESULTS
+    assert cache.get(user_id, [1.0, 0.0], 11) is None
+    print("✓ Cached entries only answer queries with limit <= their own")
+
+
+def test_limit_check_picks_best_eligible_entry():
+    """Test that a closer entry with too small a limit doesn't shadow an eligible one."""
+    cache = SemanticQueryCache(threshold=0.95)
+    user_id = uuid.uuid4()
+    small = [{"id": "small"}]
+    cache.put(user_id, rotated(5), 20, RESULTS, cache.generation(user_id))
+    cache.put(user_id, [1.0, 0.0], 1, small, cache.generation(user_id))
+
+    assert cache.get(user_id, [1.0, 0.0], 1) == small
+    assert cache.get(user_id, [1.0, 0.0], 10) == RESULTS
+    print("✓ The best entry among those with a large enough limit is used")
+
+
+def test_results_are_copied():
+    """Test that callers can't mutate the cached hit list."""
+    cache = SemanticQueryCache()
+    user_id = uuid.uuid4()
+    results = list(RESULTS)
+    cache.put(user_id, [1.0, 0.0], 10, results, cache.generation(user_id))
+    results.clear()
+
+    hit = cache.get(user_id, [1.0, 0.0], 10)
+    hit.clear()
+    assert cache.get(user_id, [1.0, 0.0], 10) == RESULTS
+    print("✓ Cached results are copied in and out")
+
+
+def test_users_are_isolated_and_invalidated():
+    """Test that entries are per user and invalidate() drops only that user's."""
+    cache = SemanticQueryCache()
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    cache.put(alice, [1.0, 0.0], 10, RESULTS, cache.generation(alice))
+    cache.put(bob, [1.0, 0.0], 10, RESULTS[:1], cache.generation(bob))
+
+    assert cache.get(bob, [1.0, 0.0], 1) == RESULTS[:1]
+
+    cache.invalidate(alice)
+    assert cache.get(alice, [1.0, 0.0], 10) is None
+    assert cache.get(bob, [1.0, 0.0], 1) == RESULTS[:1]
+    print("✓ Users are isolated and invalidated independently")
+
+
+def test_put_after_invalidate_is_dropped():
+    """Test that results read before a write are not cached once the write invalidated the user."""
+    cache = SemanticQueryCache()
+    user_id = uuid.uuid4()
+    generation = cache.generation(user_id)
+
+    # A write lands while the search is in flight
+    cache.invalidate(user_id)
+    cache.put(user_id, [1.0, 0.0], 10, RESULTS, generation)
+    assert cache.get(user_id, [1.0, 0.0], 10) is None
+
+    # A search started after the write caches as usual
+    cache.put(user_id, [1.0, 0.0], 10, RESULTS, cache.generation(user_id))
+    assert cache.get(user_id, [1.0, 0.0], 10) == RESULTS
+    print("✓ Results that raced with an invalidation are not cached")
+
+
+def test_generation_survives_eviction():
+    """Test that a token taken before an invalidation stays stale after the user is evicted."""
+    cache = SemanticQueryCache(max_users=1)
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    generation = cache.generation(alice)
+
+    cache.invalidate(alice)
+    cache.invalidate(bob)  # evicts alice's generation
+    cache.put(alice, [1.0, 0.0], 10, RESULTS, generation)
+    assert cache.get(alice, [1.0, 0.0], 10) is None
+
+    cache.put(alice, [1.0, 0.0], 10, RESULTS, cache.generation(alice))
+    assert cache.get(alice, [1.0, 0.0], 10) == RESULTS
+    print("✓ Generations stay monotonic across eviction")
+
+
+def test_entries_expire():
+    """Test that entries older than the TTL are not served."""
+    clock = FakeClock()
+    with patch("src.utils.semantic_cache.time", clock):
+        cache = SemanticQueryCache(ttl_seconds=300)
+        user_id = uuid.uuid4()
+        cache.put(user_id, [1.0, 0.0], 10, RESULTS, cache.generation(user_id))
+
+        clock.now += 300
+        assert cache.get(user_id, [1.0, 0.0], 10) == RESULTS
+        clock.now += 1
+        assert cache.get(user_id, [1.0, 0.0], 10) is None
+    print("✓ Entries expire after the TTL")
+
+
+if __name__ == "__main__":
+    print("Testing SemanticQueryCache...")
+
+    test_near_duplicate_query_hits()
+    test_query_below_threshold_misses()
+    test_limit_check()
+    test_limit_check_picks_best_eligible_entry()
+    test_results_are_copied()
+    test_users_are_isolated_and_invalidated()
+    test_put_after_invalidate_is_dropped()
+    test_generation_survives_eviction()
+    test_entries_expire()
+
+    print("\n✅ All semantic cache tests passed!")
@@ -5,7 +5,8 @@ import uuid
 import asyncio
 from unittest.mock import Mock, AsyncMock, patch
 from fastmcp import Context
-from src.utils.mcp_context import get_user_id_from_context
+from src.core.context import user_context
+from src.utils.mcp_context import get_user_id_from_context, resolve_user_id
 from src.exceptions import AuthenticationError
 
 
@@ -70,6 +71,38 @@ def test_no_user_raises_error():
             print("✓ Correctly raised error for missing user")
 
 
+def test_oauth_request_on_existing_session_resolves_token_user():
+    """
+    Test that an OAuth-token request resolves to the token's user even when it runs in a
+    session task whose context was inherited from another user's request.
+    """
+    session_creator = uuid.uuid4()
+    oauth_user = uuid.uuid4()
+
+    request = Mock()
+    request.state.user = None
+    token = Mock()
+    token.claims = {"iss": "https://accounts.google.com", "sub": "google-123"}
+    account = Mock()
+    account.user_id = oauth_user
+    get_oauth_account = AsyncMock(return_value=account)
+
+    async def resolve():
+        with user_context(session_creator):
+            return await resolve_user_id(Mock(spec=Context), AsyncMock())
+
+    with patch("src.utils.mcp_context.get_http_request", return_value=request), \
+         patch("src.utils.mcp_context.get_access_token", return_value=token), \
+         patch("src.utils.mcp_context.crud_oauth.get_oauth_account", get_oauth_account):
+        resolved = asyncio.run(resolve())
+
+    assert resolved == oauth_user
+    get_oauth_account.assert_awaited_once()
+    assert get_oauth_account.call_args.kwargs["provider"] == "google"
+    assert get_oauth_account.call_args.kwargs["subject"] == "google-123"
+    print("✓ OAuth requests on an existing session resolve to the token's user")
+
+
 async def test_concurrent_user_isolation():
     """Test that concurrent requests maintain user isolation."""
     
@@ -111,6 +144,7 @@ if __name__ == "__main__":
     test_no_context_raises_error()
     test_no_request_raises_error()
     test_no_user_raises_error()
+    test_oauth_request_on_existing_session_resolves_token_user()
     
     # Run async test
     asyncio.run(test_concurrent_user_isolation())
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Union
+
+from sqlalchemy import Row
+
+from src.db.models.user import User
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    """Detached snapshot of the user fields the auth middlewares and MCP tools consume."""
+    id: uuid.UUID
+    username: str
+    email: str
+    is_active: bool
+    is_superuser: bool
+    api_key_created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: Union[User, Row]) -> "CachedUser":
+        return cls(
+            id=user.id if isinstance(user.id, uuid.UUID) else uuid.UUID(str(user.id)),
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            api_key_created_at=user.api_key_created_at,
+        )
+
+
+class ApiKeyCache:
+    """
+    In-process TTL + LRU cache of API key -> CachedUser.
+
+    Unknown keys are cached too (as None) for a shorter negative TTL, so repeated
+    requests with a bad key - or a key scan - don't each cost a database query.
+    Keys are stored as blake2b digests so raw API keys are not kept in memory. Shared
+    between the API and MCP server threads, so access goes through a lock.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, negative_ttl_seconds: float = 10.0, max_size: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[Optional[CachedUser], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(api_key: str) -> bytes:
+        # One digest pass per lookup; the fixed 16-byte key keeps dict hashing and equality
+        # independent of the credential's length. Interning the header string wouldn't help:
+        # each request arrives as a new str, so its cached hash is never reused.
+        return hashlib.blake2b(api_key.encode(), digest_size=16).digest()
+
+    def lookup(self, api_key: str) -> tuple[bool, Optional[CachedUser]]:
+        """Return (hit, user); on a hit, user is None when the key is known to be invalid."""
+        key = self._key(api_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            user, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, user
+
+    def put(self, api_key: str, user: Optional[Union[User, Row]]) -> Optional[CachedUser]:
+        """Cache the user for api_key, or a negative entry when user is None."""
+        snapshot = CachedUser.from_user(user) if user is not None else None
+        ttl = self.ttl_seconds if snapshot is not None else self.negative_ttl_seconds
+        key = self._key(api_key)
+        with self._lock:
+            self._entries[key] = (snapshot, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, api_key: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(api_key), None)
+
+
+api_key_cache = ApiKeyCache(
+    ttl_seconds=float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "60")),
+    negative_ttl_seconds=float(os.getenv("API_KEY_CACHE_NEGATIVE_TTL_SECONDS", "10")),
+    max_size=int(os.getenv("API_KEY_CACHE_SIZE", "10000")),
+)
+
+
+def invalidate_api_key(api_key: Optional[str]) -> None:
+    """Drop an API key from the in-process cache; call whenever a key or its user changes."""
+    if api_key:
+        api_key_cache.invalidate(api_key)
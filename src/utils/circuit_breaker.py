@@ -0,0 +1,51 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker around a dependency that can go down.
+
+    After `failure_threshold` consecutive failures the circuit opens and allow_request()
+    returns False, so callers can skip the dependency (e.g. go straight to a fallback)
+    instead of waiting out its timeouts. Once `reset_timeout` seconds have passed, a single
+    probe request is let through: success closes the circuit, failure re-opens it. A probe
+    that never reports back is replaced after another `reset_timeout`. Shared across
+    threads, so access goes through a lock.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            # Open long enough (or the last probe went quiet): let one probe through
+            if now - self._changed_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._changed_at = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._changed_at = time.monotonic()
@@ -1,24 +1,124 @@
 import os
-from openai import AsyncOpenAI
+import re
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Optional
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from src.exceptions import ConfigurationError, EmbeddingError
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = ".!?,;:"
+
+
+def _normalize(text: str) -> str:
+    """Normalize text so trivially different inputs (case, spacing, trailing period) share a cache entry."""
+    return _WHITESPACE_RE.sub(" ", text.strip().lower()).rstrip(_TRAILING_PUNCTUATION).rstrip()
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of embeddings keyed by model and normalized text, with a TTL.
+
+    Shared by every EmbeddingService (API and MCP servers run on separate threads),
+    so access is guarded by a lock.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[bytes, tuple[list[float], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model: str, text: str) -> bytes:
+        return hashlib.sha256(f"{model}\x00{_normalize(text)}".encode()).digest()
+
+    def get(self, model: str, text: str) -> Optional[list[float]]:
+        key = self._key(model, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            vector, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return vector
+
+    def put(self, model: str, text: str, vector: list[float]) -> None:
+        key = self._key(model, text)
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# One cache for the whole process so store, store_batch and search all share hits
+embedding_cache = EmbeddingCache(
+    max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600")),
+)
+
+
+# httpx connection pools belong to the event loop that opened them, so the OpenAI client is
+# shared per loop (API and MCP servers run separate loops) rather than per EmbeddingService
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_shared_clients_lock = threading.Lock()
+
+
+def _get_shared_client(api_key: str) -> AsyncOpenAI:
+    """Get or create the AsyncOpenAI client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _shared_clients_lock:
+        client = _shared_clients.get(loop)
+        if client is None:
+            # Large keep-alive pool so concurrent stores/searches don't queue on the client side;
+            # the SDK's own retries already use exponential backoff with jitter
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "200")),
+                    max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "50")),
+                    keepalive_expiry=60,
+                ),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+            client = AsyncOpenAI(
+                api_key=api_key,
+                http_client=http_client,
+                max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "5")),
+            )
+            _shared_clients[loop] = client
+        return client
+
+
 class EmbeddingService:
     """Service for generating text embeddings using OpenAI."""
-    
+
     def __init__(self, embedding_model: str = None):
         self.embedding_model = embedding_model or os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-        
-        # Initialize OpenAI client
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        self.cache = embedding_cache
+
+        # Validate OpenAI configuration; the client itself is shared per event loop
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
             raise ConfigurationError(
                 message="OpenAI API key is required for embedding operations",
                 config_key="OPENAI_API_KEY",
                 expected_type="string"
             )
-        
-        self.openai_client = AsyncOpenAI(api_key=api_key)
+
+    @property
+    def openai_client(self) -> AsyncOpenAI:
+        """The shared OpenAI client for the running event loop."""
+        return _get_shared_client(self.api_key)
 
     def get_embedding_dimension(self) -> int:
         """Get the dimension size for the current embedding model."""
@@ -27,12 +127,16 @@ class EmbeddingService:
 
     async def generate_embedding(self, content: str) -> list[float]:
         """Generate embedding for the given text content (asynchronous)."""
+        cached = self.cache.get(self.embedding_model, content)
+        if cached is not None:
+            return cached
+
         try:
             resp = await self.openai_client.embeddings.create(
                 input=[content],
                 model=self.embedding_model
             )
-            return resp.data[0].embedding
+            embedding = resp.data[0].embedding
         except Exception as e:
             raise EmbeddingError(
                 message="Failed to generate embedding for content",
@@ -40,22 +144,35 @@ class EmbeddingService:
                 embedding_model=self.embedding_model,
                 original_exception=e
             )
-    
+
+        self.cache.put(self.embedding_model, content, embedding)
+        return embedding
+
     async def generate_embeddings(self, contents: list[str]) -> list[list[float]]:
         """Generate embeddings for multiple text contents in batch."""
         if not contents:
             return []
-        
+
+        # Only send cache misses to the API
+        embeddings = [self.cache.get(self.embedding_model, content) for content in contents]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not missing:
+            return embeddings
+
         try:
             resp = await self.openai_client.embeddings.create(
-                input=contents,
+                input=[contents[i] for i in missing],
                 model=self.embedding_model
             )
-            return [item.embedding for item in resp.data]
         except Exception as e:
             raise EmbeddingError(
                 message=f"Failed to generate embeddings for {len(contents)} contents",
                 text_content=f"Batch of {len(contents)} texts",
                 embedding_model=self.embedding_model,
                 original_exception=e
-            ) 
\ No newline at end of file
+            )
+
+        for i, item in zip(missing, resp.data):
+            embeddings[i] = item.embedding
+            self.cache.put(self.embedding_model, contents[i], item.embedding)
+        return embeddings
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from src.core import security
+from src.schemas.token import TokenPayload
+from src.utils.api_key_cache import CachedUser
+
+
+@dataclass(slots=True)
+class _Entry:
+    token_data: Optional[TokenPayload]
+    user: Optional[CachedUser]
+    expires_at: float
+
+
+class JWTCache:
+    """
+    In-process TTL + LRU cache of verified internal JWT -> (payload, CachedUser).
+
+    Verified tokens are stored with their payload, and an entry never outlives the token's
+    own `exp`. The resolved user snapshot is attached after the first lookup so repeat
+    requests with the same token skip both the decode and the user query. Tokens that
+    failed verification are cached too (payload None) for a shorter negative TTL, so a
+    burst of the same forged or expired token isn't re-verified each time. Keys are
+    blake2b digests of the token. Shared between the API and MCP server threads, so
+    access goes through a lock.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, negative_ttl_seconds: float = 30.0, max_size: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Same fixed-size digest key as ApiKeyCache, so long tokens don't cost more per probe
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str) -> Optional[tuple[Optional[TokenPayload], Optional[CachedUser]]]:
+        """
+        Return (token_data, user) on a hit, or None on a miss. token_data is None when the
+        token is known to be invalid.
+        """
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry.expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.token_data, entry.user
+
+    def put(self, token: str, token_data: Optional[TokenPayload]) -> None:
+        """
+        Cache a verified token (the entry expires at min(ttl, token exp)), or a negative
+        entry when token_data is None.
+        """
+        if token_data is None:
+            ttl = self.negative_ttl_seconds
+        else:
+            ttl = self.ttl_seconds
+            if token_data.exp is not None:
+                ttl = min(ttl, token_data.exp - time.time())
+        if ttl <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = _Entry(token_data, None, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set_user(self, token: str, user: CachedUser) -> None:
+        """Attach the resolved user to an already cached token."""
+        with self._lock:
+            entry = self._entries.get(self._key(token))
+            if entry is not None:
+                entry.user = user
+
+    def invalidate_subject(self, subject: Optional[str]) -> None:
+        """Drop every token issued to subject (a username); call when that user changes."""
+        if not subject:
+            return
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry.token_data is not None and entry.token_data.sub == subject
+            ]
+            for key in stale:
+                del self._entries[key]
+
+
+jwt_cache = JWTCache(
+    ttl_seconds=float(os.getenv("JWT_CACHE_TTL_SECONDS", "60")),
+    negative_ttl_seconds=float(os.getenv("JWT_CACHE_NEGATIVE_TTL_SECONDS", "30")),
+    max_size=int(os.getenv("JWT_CACHE_SIZE", "10000")),
+)
+
+
+def verify_token(token: str) -> tuple[Optional[TokenPayload], Optional[CachedUser]]:
+    """
+    Verify an internal JWT at most once per cache TTL.
+
+    Returns (token_data, user): token_data is None when the token is invalid or has no
+    subject, and user is the snapshot attached by a previous request, if any. The outcome
+    is cached either way, so repeats skip the signature check.
+    """
+    cached = jwt_cache.get(token)
+    if cached:
+        return cached
+    token_data = security.decode_token(token)
+    if token_data is not None and token_data.sub is None:
+        token_data = None
+    jwt_cache.put(token, token_data)
+    return token_data, None
@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+from collections import Counter
+
+
+class LogRateLimiter:
+    """
+    Per-key token bucket that decides whether an event should be logged.
+
+    Each key (e.g. client IP + API key prefix) may log `burst` events at once and then
+    `rate_per_second` on average; anything over that is only counted. This keeps a key
+    scanner from turning every rejected request into a formatted log line. `counts`
+    tallies every event by reason, logged or not. Shared between the API and MCP server
+    threads, so access goes through a lock.
+    """
+
+    def __init__(self, rate_per_second: float = 1.0, burst: int = 10, max_keys: int = 10_000):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_keys = max_keys
+        self.counts: Counter[str] = Counter()
+        self._buckets: dict[str, tuple[float, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, key: str, reason: str) -> tuple[bool, int]:
+        """
+        Record an event and return (should_log, suppressed), where suppressed is the number
+        of events for this key dropped since it last logged.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.counts[reason] += 1
+            tokens, last, suppressed = self._buckets.get(key, (float(self.burst), now, 0))
+            tokens = min(float(self.burst), tokens + (now - last) * self.rate_per_second)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False, suppressed + 1
+
+            # Crude bound on memory under a scan from many addresses; buckets refill anyway
+            if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                self._buckets.clear()
+            self._buckets[key] = (tokens - 1.0, now, 0)
+            return True, suppressed
+
+
+auth_failure_log_limiter = LogRateLimiter(
+    rate_per_second=float(os.getenv("AUTH_FAILURE_LOG_RATE", "1")),
+    burst=int(os.getenv("AUTH_FAILURE_LOG_BURST", "10")),
+)
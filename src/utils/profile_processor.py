@@ -9,7 +9,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.database import get_async_sessionmaker
 from src.db.models import UserMessage, ProcessedUserProfile
-from src.nlp.synthesize_user_profile import get_llm_profile_synthesis
 from src.exceptions import UserContextError
 from src.tasks import update_profile_background
 
@@ -17,6 +16,8 @@ logger = logging.getLogger(__name__)
 
 
 LLM_PROCESS_BATCH_SIZE = int(os.getenv("LLM_PROCESS_BATCH_SIZE", "3"))
+# Minimum age of the stored profile before another background refresh is queued
+PROFILE_UPDATE_DEBOUNCE_SECONDS = float(os.getenv("PROFILE_UPDATE_DEBOUNCE_SECONDS", "5"))
 
 class ProfileProcessor:
     """Service for processing user profiles and messages."""
@@ -46,6 +47,12 @@ class ProfileProcessor:
             unprocessed_messages = list(unprocessed_result.scalars().all())
             return True, unprocessed_messages
 
+        # Debounce: a profile refreshed moments ago will pick up new messages on a later turn
+        profile_age = (datetime.now(timezone.utc) - existing_profile.updated_at).total_seconds()
+        if profile_age < PROFILE_UPDATE_DEBOUNCE_SECONDS:
+            logger.debug(f"Profile for user {user_id} updated {profile_age:.1f}s ago. Skipping update.")
+            return False, []
+
         # Check if profile is effectively empty (both metadata and summary are null/empty)
         profile_is_empty = (
             not existing_metadata_json_str or existing_metadata_json_str.strip() == "" or existing_metadata_json_str.strip() == "{}"
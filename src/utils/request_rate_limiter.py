@@ -0,0 +1,34 @@
+import threading
+import time
+
+
+class RequestRateLimiter:
+    """
+    Token bucket that spaces out outgoing requests to a rate-limited provider.
+
+    Up to `burst` requests go out at once, then `rate_per_minute` on average. reserve()
+    always grants a slot and returns how long the caller must wait before using it, so
+    sync callers can time.sleep() and async callers asyncio.sleep() on the same limiter.
+    A rate of 0 disables limiting. Shared across threads, so access goes through a lock.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a slot and return the delay in seconds before it may be used."""
+        if self.rate_per_second <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.rate_per_second)
+            self._last = now
+            # Tokens may go negative: each waiter queues behind the slots already promised
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate_per_second
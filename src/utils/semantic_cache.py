@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Optional
+
+import numpy as np
+
+
+class SemanticQueryCache:
+    """
+    Per-user cache of search results keyed by query embedding.
+
+    A lookup hits when a recently cached query vector for the same user has cosine
+    similarity >= threshold with the incoming query, so near-duplicate prompts skip the
+    Qdrant search. Each user keeps a small ring buffer of entries; users are evicted LRU
+    and entries expire after ttl_seconds. Writes to a user's memories must call
+    invalidate() once the write has reached Qdrant, so stale hit lists are never served.
+
+    A search that read Qdrant before a write could otherwise cache its results after that
+    write's invalidate(). Callers therefore take generation() before searching and pass it
+    to put(), which drops the results if the user was invalidated in the meantime.
+
+    The cache is per process: with several server workers, a write only clears the cache
+    of the worker that handled it, and the others can serve results up to ttl_seconds old.
+    Shared between the API and MCP server threads, so all access goes through a lock.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl_seconds: float = 300.0,
+        entries_per_user: int = 32,
+        max_users: int = 1_000
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.entries_per_user = entries_per_user
+        self.max_users = max_users
+        self._users: OrderedDict[uuid.UUID, deque] = OrderedDict()
+        # Per-user generation, bumped by invalidate(). Values only ever increase, and users
+        # evicted from this LRU fall back to _generation_floor, which is raised to at least
+        # their last generation, so a token taken before an invalidation never matches again.
+        self._generations: OrderedDict[uuid.UUID, int] = OrderedDict()
+        self._last_generation = 0
+        self._generation_floor = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding: list[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, user_id: uuid.UUID, embedding: list[float], limit: int) -> Optional[list[dict]]:
+        """Return cached results for a near-duplicate query, or None on a miss."""
+        query = self._unit(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            entries = self._users.get(user_id)
+            if not entries:
+                return None
+
+            # Drop expired entries (oldest are on the left)
+            while entries and now - entries[0][2] > self.ttl_seconds:
+                entries.popleft()
+            # Only entries fetched with at least this many results can answer the query
+            candidates = [entry for entry in entries if entry[3] >= limit]
+            if not candidates:
+                return None
+
+            matrix = np.stack([entry[0] for entry in candidates])
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+
+            self._users.move_to_end(user_id)
+            return list(candidates[best][1][:limit])
+
+    def generation(self, user_id: uuid.UUID) -> int:
+        """Return the token to pass to put(); take it before the search whose results are cached."""
+        with self._lock:
+            return self._generations.get(user_id, self._generation_floor)
+
+    def put(self, user_id: uuid.UUID, embedding: list[float], limit: int, results: list[dict], generation: int) -> None:
+        """Cache results, unless the user was invalidated since generation was taken."""
+        with self._lock:
+            if self._generations.get(user_id, self._generation_floor) != generation:
+                return
+            entries = self._users.get(user_id)
+            if entries is None:
+                entries = deque(maxlen=self.entries_per_user)
+                self._users[user_id] = entries
+            entries.append((self._unit(embedding), list(results), time.monotonic(), limit))
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """Forget every cached query for the user; call after any write to their memories."""
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._last_generation += 1
+            self._generations[user_id] = self._last_generation
+            self._generations.move_to_end(user_id)
+            while len(self._generations) > self.max_users:
+                _, evicted = self._generations.popitem(last=False)
+                self._generation_floor = max(self._generation_floor, evicted)
+
+
+# Shared by every MemoryManager so a write through the API invalidates results cached by MCP
+semantic_query_cache = SemanticQueryCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+    ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "300")),
+)
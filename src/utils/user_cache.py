@@ -1,14 +1,73 @@
 import json
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 from datetime import datetime
 from src.db.models.user import User
 from src.utils.redis_client import get_redis_client
+from src.utils.api_key_cache import invalidate_api_key
+from src.utils.jwt_cache import jwt_cache
 
 logger = logging.getLogger(__name__)
 
 CACHE_TTL = 300
 
+# Compact separators keep the payload that crosses the Redis socket small; built once
+# rather than per call
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+class _LocalUserCache:
+    """
+    Small in-process TTL + LRU layer in front of Redis, keyed by the Redis cache key.
+
+    Holds the decoded user dict, so a hit skips the Redis round-trip and json.loads; each
+    caller still gets its own freshly built User. Shared between the API and MCP server
+    threads, so access goes through a lock.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_size: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def put(self, keys: list[str], data: dict) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (data, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys: list[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+# Bounded by a short TTL because other processes only invalidate Redis, not this layer
+_local_cache = _LocalUserCache(
+    ttl_seconds=float(os.getenv("USER_CACHE_LOCAL_TTL_SECONDS", "60")),
+    max_size=int(os.getenv("USER_CACHE_LOCAL_SIZE", "10000")),
+)
+
 
 def _user_to_dict(user: User) -> dict:
     try:
@@ -63,6 +122,10 @@ def _get_cache_keys(user: User) -> list[str]:
 
 
 def get_cached_user(key: str) -> Optional[User]:
+    user_dict = _local_cache.get(key)
+    if user_dict is not None:
+        return _dict_to_user(user_dict)
+
     redis_client = get_redis_client()
     if redis_client is None:
         return None
@@ -71,6 +134,7 @@ def get_cached_user(key: str) -> Optional[User]:
         cached_data = redis_client.get(key)
         if cached_data:
             user_dict = json.loads(cached_data)
+            _local_cache.put([key], user_dict)
             return _dict_to_user(user_dict)
     except Exception as e:
         logger.warning(f"Failed to get cached user for key {key}: {e}")
@@ -85,55 +149,70 @@ def set_cached_user(user: User) -> None:
 
     try:
         user_dict = _user_to_dict(user)
-        user_json = json.dumps(user_dict)
+        user_json = _ENCODER.encode(user_dict)
 
         keys = _get_cache_keys(user)
-        pipeline = redis_client.pipeline()
+        # One round-trip for all keys; no MULTI/EXEC, since each SETEX stands alone and a
+        # partially written set only means a later cache miss
+        pipeline = redis_client.pipeline(transaction=False)
         for key in keys:
             pipeline.setex(key, CACHE_TTL, user_json)
         pipeline.execute()
+        _local_cache.put(keys, user_dict)
 
-        logger.debug(f"Cached user {user.username} with {len(keys)} keys")
+        logger.debug("Cached user %s with %d keys", user.username, len(keys))
     except Exception as e:
         logger.warning(f"Failed to cache user {user.username}: {e}")
 
 
 def invalidate_user_cache(user: User, old_username: Optional[str] = None, old_api_key: Optional[str] = None) -> None:
+    invalidate_api_key(user.api_key)
+    invalidate_api_key(old_api_key)
+    jwt_cache.invalidate_subject(user.username)
+    jwt_cache.invalidate_subject(old_username)
+
+    keys = _get_cache_keys(user)
+
+    if old_username and old_username != user.username:
+        keys.append(f"user:username:{old_username}")
+
+    if old_api_key and old_api_key != user.api_key:
+        keys.append(f"user:apikey:{old_api_key}")
+
+    _local_cache.invalidate(keys)
+
     redis_client = get_redis_client()
     if redis_client is None:
         return
 
     try:
-        keys = _get_cache_keys(user)
-
-        if old_username and old_username != user.username:
-            keys.append(f"user:username:{old_username}")
-
-        if old_api_key and old_api_key != user.api_key:
-            keys.append(f"user:apikey:{old_api_key}")
-
         if keys:
             redis_client.delete(*keys)
-            logger.debug(f"Invalidated {len(keys)} cache keys for user {user.username}")
+            logger.debug("Invalidated %d cache keys for user %s", len(keys), user.username)
     except Exception as e:
         logger.warning(f"Failed to invalidate cache for user {user.username}: {e}")
 
 
 def invalidate_user_cache_by_keys(user_id: str, username: str, email: str, api_key: Optional[str] = None) -> None:
+    invalidate_api_key(api_key)
+    jwt_cache.invalidate_subject(username)
+
+    keys = [
+        f"user:id:{user_id}",
+        f"user:username:{username}",
+        f"user:email:{email}",
+    ]
+    if api_key:
+        keys.append(f"user:apikey:{api_key}")
+
+    _local_cache.invalidate(keys)
+
     redis_client = get_redis_client()
     if redis_client is None:
         return
 
     try:
-        keys = [
-            f"user:id:{user_id}",
-            f"user:username:{username}",
-            f"user:email:{email}",
-        ]
-        if api_key:
-            keys.append(f"user:apikey:{api_key}")
-
         redis_client.delete(*keys)
-        logger.debug(f"Invalidated {len(keys)} cache keys for user {username}")
+        logger.debug("Invalidated %d cache keys for user %s", len(keys), username)
     except Exception as e:
         logger.warning(f"Failed to invalidate cache for user {username}: {e}")
@@ -1,7 +1,13 @@
 import os
+import math
 import uuid
+import asyncio
+import logging
+import threading
+import weakref
+from functools import lru_cache
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, TYPE_CHECKING
+from typing import Optional, List, Dict, Union, TYPE_CHECKING
 
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.models import (
@@ -11,6 +17,9 @@ from qdrant_client.models import (
     Filter,
     FieldCondition,
     MatchValue,
+    SearchParams,
+    HasIdCondition,
+    FilterSelector,
 )
 
 from src.exceptions import QdrantServiceError, MemorySearchError
@@ -19,6 +28,64 @@ from src.utils.embedding import EmbeddingService
 if TYPE_CHECKING:
     from fastmcp import Context
 
+logger = logging.getLogger(__name__)
+
+# How many searches to aggregate before logging the retrieved/limit ratio
+_RECALL_LOG_INTERVAL = 100
+
+# AsyncQdrantClient connections belong to the event loop that opened them, and the API and
+# MCP servers run separate loops, so clients are shared per loop (and per connection
+# settings) instead of one per VectorStore instance
+_shared_clients: Dict[asyncio.AbstractEventLoop, Dict[tuple, AsyncQdrantClient]] = weakref.WeakKeyDictionary()
+_shared_clients_lock = threading.Lock()
+
+
+def _get_shared_client(settings: tuple) -> AsyncQdrantClient:
+    """Get or create the AsyncQdrantClient for these settings on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _shared_clients_lock:
+        clients = _shared_clients.get(loop)
+        if clients is None:
+            clients = {}
+            _shared_clients[loop] = clients
+        client = clients.get(settings)
+        if client is None:
+            host, port, grpc_port, timeout, prefer_grpc, keepalive_ms = settings
+            client = AsyncQdrantClient(
+                host=host,
+                port=port,
+                grpc_port=grpc_port,
+                timeout=timeout,
+                prefer_grpc=prefer_grpc,
+                grpc_options={"grpc.keepalive_time_ms": keepalive_ms}
+            )
+            clients[settings] = client
+        return client
+
+
+async def close_shared_clients() -> None:
+    """Close the Qdrant clients opened on the running event loop. Used during shutdown."""
+    with _shared_clients_lock:
+        clients = _shared_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Error closing Qdrant client: {e}")
+
+
+@lru_cache(maxsize=10_000)
+def _user_filter(user_id_str: str) -> Filter:
+    """Build (once per user) the Qdrant filter restricting points to a user's memories."""
+    return Filter(
+        must=[
+            FieldCondition(
+                key="user_id",
+                match=MatchValue(value=user_id_str)
+            )
+        ]
+    )
+
 
 class VectorStore:
     """Service for managing vector storage and retrieval in Qdrant."""
@@ -33,25 +100,40 @@ class VectorStore:
     ):
         self.host = host or os.getenv("QDRANT_HOST", "localhost")
         self.port = port or int(os.getenv("QDRANT_PORT", "6333"))
+        self.grpc_port = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
         self.collection_name = collection_name or os.getenv("QDRANT_COLLECTION_NAME", "memories")
         
         self.score_threshold = score_threshold if score_threshold is not None else float(os.getenv("MEMORY_SCORE_THRESHOLD", "0.40"))
         self.upper_score_threshold = upper_score_threshold if upper_score_threshold is not None else float(os.getenv("MEMORY_UPPER_SCORE_THRESHOLD", "0.98"))
         
         self.timeout = float(os.getenv("QDRANT_TIMEOUT", "60"))
-        self.prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+        # gRPC (HTTP/2 + protobuf) is cheaper than REST/JSON for 1536-float vectors
+        self.prefer_grpc = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+        self.grpc_keepalive_ms = int(os.getenv("QDRANT_GRPC_KEEPALIVE_MS", "30000"))
+
+        # Running totals for the recall proxy (retrieved / limit) logged by search_memories
+        self._search_count = 0
+        self._search_retrieved = 0
+        self._search_requested = 0
         
         # Initialize services
         self.embedding_service = EmbeddingService()
         
-        # Initialize Qdrant client
+        # Qdrant client settings; the client itself is shared per event loop
+        self._client_settings = (
+            self.host,
+            self.port,
+            self.grpc_port,
+            self.timeout,
+            self.prefer_grpc,
+            self.grpc_keepalive_ms
+        )
+
+    @property
+    def client(self) -> AsyncQdrantClient:
+        """The shared Qdrant client for the running event loop."""
         try:
-            self.client = AsyncQdrantClient(
-                host=self.host, 
-                port=self.port,
-                timeout=self.timeout,
-                prefer_grpc=self.prefer_grpc
-            )
+            return _get_shared_client(self._client_settings)
         except Exception as e:
             raise QdrantServiceError(
                 message="Failed to connect to Qdrant database",
@@ -82,7 +164,7 @@ class VectorStore:
 
     async def store_memory(
         self, 
-        memory_id: str, 
+        memory_id: Union[str, uuid.UUID], 
         content: str, 
         user_id: uuid.UUID, 
         tags: Optional[list[str]] = None
@@ -101,7 +183,7 @@ class VectorStore:
                 "user_id": str(user_id)
             }
             point = PointStruct(
-                id=memory_id,
+                id=str(memory_id),
                 vector=vector,
                 payload=payload
             )
@@ -119,33 +201,65 @@ class VectorStore:
                 original_exception=e
             )
 
-    async def search_memories(self, query_text: str, user_id: uuid.UUID) -> list[dict]:
-        """Search for memories related to the query text, filtered by user."""
+    async def store_memories_bulk(
+        self,
+        memory_ids: list[uuid.UUID],
+        contents: list[str],
+        user_id: uuid.UUID,
+        tags_list: list[Optional[list[str]]]
+    ) -> None:
+        """Store several memories with one embedding request and one Qdrant upsert."""
+        if not memory_ids:
+            return
+
         try:
             await self._ensure_collection_exists()
-            
-            # Use async embedding generation for better concurrency
-            query_embedding = await self.embedding_service.generate_embedding(query_text)
-
-            # Create filter to only search memories for the current user
-            user_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="user_id",
-                        match=MatchValue(value=str(user_id))
-                    )
-                ]
-            )
 
-            # Use async Qdrant search for better concurrency
-            search_result = await self.client.search(
+            vectors = await self.embedding_service.generate_embeddings(contents)
+
+            user_id_str = str(user_id)
+            timestamp = datetime.now(timezone.utc).isoformat()
+            points = [
+                PointStruct(
+                    id=str(memory_id),
+                    vector=vector,
+                    payload={
+                        "content": content,
+                        "tags": tags or [],
+                        "timestamp": timestamp,
+                        "user_id": user_id_str
+                    }
+                )
+                for memory_id, content, tags, vector in zip(memory_ids, contents, tags_list, vectors)
+            ]
+
+            await self.client.upsert(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
-                query_filter=user_filter,
-                score_threshold=self.score_threshold,
-                limit=25,
-                with_payload=True
+                points=points,
+                wait=True
             )
+        except Exception as e:
+            raise QdrantServiceError(
+                message="Failed to store memories in vector database",
+                operation="batch_upsert",
+                collection_name=self.collection_name,
+                original_exception=e
+            )
+
+    async def embed(self, text: str) -> list[float]:
+        """Embed a query string with the store's embedding service."""
+        return await self.embedding_service.generate_embedding(text)
+
+    async def search_memories(
+        self,
+        query_text: str,
+        user_id: uuid.UUID,
+        limit: int = 25,
+        time_budget_ms: Optional[int] = None
+    ) -> list[dict]:
+        """Search for memories related to the query text, filtered by user."""
+        try:
+            query_embedding = await self.embed(query_text)
         except Exception as e:
             raise MemorySearchError(
                 message="Failed to search memories in vector database",
@@ -155,6 +269,55 @@ class VectorStore:
                 original_exception=e
             )
 
+        return await self.search_memories_with_embedding(
+            query_embedding, user_id, limit=limit, time_budget_ms=time_budget_ms, query_text=query_text
+        )
+
+    async def search_memories_with_embedding(
+        self,
+        query_embedding: list[float],
+        user_id: uuid.UUID,
+        limit: int = 25,
+        time_budget_ms: Optional[int] = None,
+        query_text: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Search for memories near an already computed query embedding, filtered by user.
+
+        The HNSW candidate pool (hnsw_ef) scales with limit so recall does not collapse
+        for larger result sets. If time_budget_ms is given the search is cancelled once the
+        budget is spent and MemorySearchError is raised. Qdrant's own timeout only takes
+        whole seconds, so the server-side limit is the budget rounded up.
+        """
+        user_id_str = str(user_id)
+        search_params = SearchParams(hnsw_ef=max(64, 4 * limit))
+        timeout = math.ceil(time_budget_ms / 1000) if time_budget_ms is not None else None
+        try:
+            await self._ensure_collection_exists()
+
+            # Use async Qdrant search for better concurrency, only over the current user's memories
+            search_result = await asyncio.wait_for(
+                self.client.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_embedding,
+                    query_filter=_user_filter(user_id_str),
+                    search_params=search_params,
+                    score_threshold=self.score_threshold,
+                    limit=limit,
+                    with_payload=True,
+                    timeout=timeout
+                ),
+                timeout=time_budget_ms / 1000 if time_budget_ms is not None else None
+            )
+        except Exception as e:
+            raise MemorySearchError(
+                message="Failed to search memories in vector database",
+                query_text=query_text,
+                user_id=user_id_str,
+                search_type="semantic_search",
+                original_exception=e
+            )
+
         results = []
         for hit in search_result:
             # Apply upper score threshold if provided
@@ -170,8 +333,25 @@ class VectorStore:
                 "timestamp": payload.get("timestamp"),
                 "user_id": payload.get("user_id")
             })
+
+        self._record_recall(len(search_result), limit)
         return results
 
+    def _record_recall(self, retrieved: int, limit: int) -> None:
+        """Accumulate retrieved/limit and periodically log it to spot recall degradation."""
+        self._search_count += 1
+        self._search_retrieved += retrieved
+        self._search_requested += limit
+        if self._search_count >= _RECALL_LOG_INTERVAL:
+            logger.info(
+                "Qdrant search recall proxy over last %d searches: %.2f (retrieved/limit)",
+                self._search_count,
+                self._search_retrieved / self._search_requested
+            )
+            self._search_count = 0
+            self._search_retrieved = 0
+            self._search_requested = 0
+
     async def retrieve_vectors(
         self, memory_ids: List[str], user_id: uuid.UUID
     ) -> Dict[str, List[float]]:
@@ -245,26 +425,16 @@ class VectorStore:
         """Delete all memories for a user from the vector database. Returns count of deleted memories."""
         try:
             # Use filter to delete all points for the user
-            user_filter = Filter(
-                must=[
-                    FieldCondition(
-                        key="user_id",
-                        match=MatchValue(value=str(user_id))
-                    )
-                ]
-            )
+            user_filter = _user_filter(str(user_id))
             
             # Get count before deletion for return value
-            search_result = await self.client.search(
+            count_result = await self.client.count(
                 collection_name=self.collection_name,
-                query_vector=[0.0] * self.embedding_service.get_embedding_dimension(),  # Dummy vector
-                query_filter=user_filter,
-                limit=10000,  # Large limit to get all memories
-                with_payload=False,
-                with_vectors=False
+                count_filter=user_filter,
+                exact=True
             )
             
-            count = len(search_result)
+            count = count_result.count
             
             if count > 0:
                 # Delete all points for the user
@@ -283,6 +453,36 @@ class VectorStore:
                 original_exception=e
             )
 
+    async def delete_memories_bulk(self, memory_ids: List[uuid.UUID], user_id: uuid.UUID) -> int:
+        """
+        Delete the given memories in a single request. The user filter is part of the
+        selector, so IDs belonging to other users are left untouched.
+        """
+        if not memory_ids:
+            return 0
+
+        try:
+            await self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(
+                    filter=Filter(
+                        must=[
+                            FieldCondition(key="user_id", match=MatchValue(value=str(user_id))),
+                            HasIdCondition(has_id=[str(memory_id) for memory_id in memory_ids]),
+                        ]
+                    )
+                ),
+                wait=True  # Ensure the operation completes
+            )
+            return len(memory_ids)
+        except Exception as e:
+            raise QdrantServiceError(
+                message="Failed to delete memories from vector database",
+                operation="bulk_delete",
+                collection_name=self.collection_name,
+                original_exception=e
+            )
+
     async def store_memories_batch(
         self,
         memories: List[Dict[str, any]],
@@ -307,6 +507,7 @@ class VectorStore:
         # Process embeddings in batches
         batch_size = 10
         points = []
+        user_id_str = str(user_id)
         
         for i in range(0, total, batch_size):
             if ctx:
@@ -326,7 +527,7 @@ class VectorStore:
                         vector=embedding,
                         payload={
                             "content": memory['content'],
-                            "user_id": str(user_id),
+                            "user_id": user_id_str,
                             "tags": memory.get('tags', []),
                             "timestamp": datetime.now(timezone.utc).isoformat()
                         }
@@ -359,9 +560,8 @@ class VectorStore:
         return len(points)
 
     async def close(self):
-        """Close the async client connection."""
-        try:
-            await self.client.close()
-        except Exception as e:
-            # Log the error but don't raise as this is cleanup
-            pass 
\ No newline at end of file
+        """
+        Release this store. The Qdrant client is shared with every other VectorStore on the
+        event loop, so it stays open; close_shared_clients() closes it at shutdown.
+        """
+        pass 
\ No newline at end of file